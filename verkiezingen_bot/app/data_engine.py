@@ -5,13 +5,19 @@ Stuurt een vraag + schema + few-shot voorbeelden naar de LLM,
 voert de gegenereerde SQL uit op SQLite, en formuleert een antwoord.
 """
 
+import asyncio
+import hashlib
 import os
 import re
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Iterator
 from pathlib import Path
 
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, DefaultAioHttpClient
 
 load_dotenv(Path(__file__).parent.parent / ".env")
 
@@ -21,6 +27,23 @@ LLM_MODEL = "meta-llama/llama-3.3-70b-instruct"
 LLM_BASE_URL = "https://openrouter.ai/api/v1"
 
 QUERY_TIMEOUT = 5  # seconden
+REQUEST_TIMEOUT = 30  # seconden, bovengrens voor één volledige vraag
+MAX_SQL_RETRIES = 1  # nieuwe SQL laten genereren na een fout bij uitvoeren
+QUERY_PROGRESS_STEPS = 1000  # aantal VM-instructies tussen deadline-checks
+
+# SQLite-geheugen per connectie: 64 MiB page cache + mmap van het bestand.
+# Kost ~70 MB RSS (de database zelf is ~13 MB, dus in de praktijk minder);
+# houd dit in gedachten op kleine Streamlit Cloud instances.
+SQLITE_CACHE_SIZE_KIB = 65536
+SQLITE_MMAP_SIZE = 512 * 1024 * 1024  # bytes
+
+# Cache voor antwoorden en queryresultaten (de database verandert niet)
+CACHE_TTL = 3600  # seconden
+CACHE_MAX_ENTRIES = 2048
+
+# Maximaal aantal vragen dat ask_data_many tegelijk in behandeling heeft
+# (houdt ons onder de rate limit van OpenRouter)
+BATCH_CONCURRENCY = 32
 
 
 def _get_api_key():
@@ -98,7 +121,7 @@ csb_stemmen_partij (verkiezing_id, partij_id, stemmen)
 csb_stemmen_kandidaat (verkiezing_id, kandidaat_id, stemmen)
   -- stemmen per kandidaat landelijk (CSB-niveau)
 
-=== VIEWS (gebruik deze als ze handig zijn) ===
+=== VOORBEREKENDE TABELLEN (gebruik deze als ze handig zijn) ===
 
 v_gemeente_partij (gemeente, gemeente_code, kieskring_naam, kiesgerechtigden, partij, partij_kort, stemmen)
   -- stemmen per partij per gemeente, al geaggregeerd over stembureaus
@@ -191,13 +214,53 @@ SQL_SYSTEM_PROMPT = f"""Je bent een SQL-expert die vragen over Nederlandse verki
 === INSTRUCTIES ===
 1. Genereer ALLEEN een SELECT query. Nooit INSERT, UPDATE, DELETE, DROP, ALTER of andere mutaties.
 2. Gebruik naam_kort voor partijnamen (bijv. 'PVV', 'GL-PvdA', 'VVD').
-3. Gebruik de views (v_gemeente_partij, v_kieskring_partij, v_stembureau_overzicht) als ze handig zijn.
+3. Gebruik de voorberekende tabellen (v_gemeente_partij, v_kieskring_partij, v_stembureau_overzicht) als ze handig zijn.
 4. Gebruik GEEN commentaar of uitleg. Geef ALLEEN de SQL query terug.
 5. Zorg dat de query correct SQLite-syntax gebruikt.
 6. Raadpleeg het data-woordenboek voor begrippen, bijzonderheden en aggregatieniveaus.
 7. Beperk resultaten tot maximaal 50 rijen met LIMIT tenzij de gebruiker anders vraagt.
 """
 
+
+# Verboden sleutelwoorden als heel woord (niet als deel van kolomnaam), in één scan
+_FORBIDDEN_RE = re.compile(
+    r"\b(INSERT|UPDATE|DELETE|DROP|ALTER|CREATE|ATTACH|DETACH|PRAGMA|VACUUM|REINDEX)\b",
+    re.IGNORECASE,
+)
+_SQL_START_RE = re.compile(r"\s*(?:SELECT|WITH)", re.IGNORECASE)
+# Kolommen met een telling of optelsom; alleen die krijgen een vast antwoord
+_COUNT_COLUMN_RE = re.compile(r"stemmen|zetels|aantal|totaal|count\(|sum\(", re.IGNORECASE)
+# Markdown code block (```sql ... ```) en een "SQL:" prefix rond de query, in één match
+_CLEAN_RE = re.compile(
+    r"\A\s*(?:```[a-z]*\s*)?(?:SQL:\s*)?(.*?)\s*(?:```.*)?\Z",
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _clean_sql(raw: str) -> str:
+    """Haal de kale SQL query uit het LLM-antwoord."""
+    return _CLEAN_RE.match(raw).group(1)
+
+
+def _compact_prompt(text: str) -> str:
+    """Verwijder overbodige witruimte (uitlijning, lege regels) zodat de prompt minder tokens kost."""
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r" *\n *", "\n", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+
+# Eenmalig bij import: compacte prompt, verstuurd als statisch blok met een
+# cache_control marker zodat OpenRouter de prefix bij providers met prompt
+# caching hergebruikt (providers zonder caching negeren de marker)
+SQL_SYSTEM_PROMPT = _compact_prompt(SQL_SYSTEM_PROMPT)
+SQL_SYSTEM_MESSAGE = {
+    "role": "system",
+    "content": [
+        {"type": "text", "text": SQL_SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}},
+    ],
+}
+
 ANSWER_SYSTEM_PROMPT = """Je formuleert een antwoord op basis van data uit een verkiezingsdatabase.
 
 Format (volg dit EXACT):
@@ -213,67 +276,196 @@ Antwoord: De PVV kreeg 29.546 stemmen in Amsterdam. Hiervoor zijn de stemmen van
 Als de data leeg is, zeg dat er geen resultaten zijn gevonden."""
 
 
+def _format_number(value) -> str:
+    """Formatteer een getal op zijn Nederlands (29.546 / 12,35)."""
+    if isinstance(value, float) and not value.is_integer():
+        text = f"{value:,.2f}"
+    else:
+        text = f"{int(value):,}"
+    return text.replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _try_template_answer(columns: list[str], rows: list[tuple]) -> str | None:
+    """
+    Vast antwoord voor triviale resultaten, zodat de tweede LLM-call overbodig is.
+
+    Retourneert None als het resultaat te complex is voor een template.
+    """
+    if not rows:
+        return "Er zijn geen resultaten gevonden."
+    if len(rows) != 1:
+        return None
+
+    row = rows[0]
+    numbers = [
+        (col, v) for col, v in zip(columns, row)
+        if isinstance(v, (int, float)) and not isinstance(v, bool)
+    ]
+    labels = [v for v in row if isinstance(v, str)]
+    if len(numbers) != 1 or not _COUNT_COLUMN_RE.search(numbers[0][0]):
+        # Jaartallen, nummers, percentages: de LLM weet wat het getal betekent.
+        return None
+    number = _format_number(numbers[0][1])
+
+    if len(row) == 1:
+        return f"Het antwoord is {number}."
+    if len(row) == 2 and len(labels) == 1:
+        return f"{labels[0]}: {number}."
+    return None
+
+
+class _TTLCache:
+    """Thread-safe LRU-cache waarvan entries na `ttl` seconden verlopen."""
+
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, object]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self._ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self._max_entries:
+                self._data.popitem(last=False)
+
+
+async def _next_or_none(stream: AsyncIterator):
+    """Volgende element van een async iterator, of None als die op is."""
+    try:
+        return await anext(stream)
+    except StopAsyncIteration:
+        return None
+
+
+def _timeout_result() -> dict:
+    """Resultaat voor een vraag die niet binnen REQUEST_TIMEOUT beantwoord is."""
+    error = f"De vraag kon niet binnen {REQUEST_TIMEOUT} seconden beantwoord worden."
+    return {"answer": error, "sql": "", "data_table": [], "columns": [], "error": error}
+
+
+def _question_key(question: str) -> str:
+    """Cachesleutel voor een vraag: hoofdletter- en witruimte-ongevoelig."""
+    return hashlib.sha1(question.strip().lower().encode("utf-8")).hexdigest()
+
+
 class DataEngine:
     """Text-to-SQL engine voor verkiezingsdata."""
 
     def __init__(self, db_path: Path = DB_PATH):
         self._db_path = db_path
-        self._llm = OpenAI(base_url=LLM_BASE_URL, api_key=_get_api_key())
+        self._max_retries = MAX_SQL_RETRIES
+        # Eén vaste event loop per engine: de aiohttp-sessie van de client hoort
+        # bij de loop waarop hij is aangemaakt, dus alle LLM-calls lopen via deze loop.
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._loop_thread.start()
+        self._llm = AsyncOpenAI(
+            base_url=LLM_BASE_URL,
+            api_key=_get_api_key(),
+            http_client=DefaultAioHttpClient(),
+        )
+        # vraag -> volledig resultaat, en SQL -> (kolommen, rijen): twee vragen
+        # die op dezelfde query uitkomen delen zo één uitvoering
+        self._answer_cache = _TTLCache()
+        self._sql_cache = _TTLCache()
+        # Eén blijvende connectie per engine, zodat de page cache warm blijft.
+        # Queries komen uit meerdere threads (asyncio.to_thread), dus via een lock.
+        self._conn = self._get_connection()
+        self._conn_lock = threading.Lock()
+
+    def _run(self, coro):
+        """Voer een coroutine uit op de event loop van de engine en wacht op het resultaat."""
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def close(self):
+        """Sluit de LLM-client, de databaseconnectie en de event loop."""
+        if self._loop.is_closed():
+            return
+        self._run(self._llm.close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join()
+        self._loop.close()
+        self._conn.close()
 
     def _get_connection(self) -> sqlite3.Connection:
         """Open een read-only SQLite connectie."""
         uri = f"file:{self._db_path}?mode=ro"
-        conn = sqlite3.connect(uri, uri=True, timeout=QUERY_TIMEOUT)
-        conn.execute(f"PRAGMA busy_timeout = {QUERY_TIMEOUT * 1000}")
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.execute("PRAGMA query_only = 1")
+        conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KIB}")
+        conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
         return conn
 
-    def _generate_sql(self, question: str) -> str:
+    async def _generate_sql(self, question: str) -> str:
         """Laat de LLM een SQL query genereren."""
-        response = self._llm.chat.completions.create(
+        response = await self._llm.chat.completions.create(
             model=LLM_MODEL,
             messages=[
-                {"role": "system", "content": SQL_SYSTEM_PROMPT},
+                SQL_SYSTEM_MESSAGE,
                 {"role": "user", "content": question},
             ],
             temperature=0.0,
         )
-        raw = response.choices[0].message.content.strip()
-
-        # Strip markdown code blocks als de LLM die toevoegt
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            # Verwijder eerste en laatste ``` regel
-            lines = [l for l in lines if not l.strip().startswith("```")]
-            raw = "\n".join(lines).strip()
-
-        # Strip eventuele SQL prefix
-        if raw.upper().startswith("SQL:"):
-            raw = raw[4:].strip()
-
-        return raw
+        return _clean_sql(response.choices[0].message.content)
 
     def _validate_sql(self, sql: str) -> str | None:
         """Controleer of de query veilig is. Retourneert foutmelding of None."""
-        sql_upper = sql.upper().strip()
-        forbidden = ["INSERT", "UPDATE", "DELETE", "DROP", "ALTER", "CREATE", "ATTACH", "DETACH"]
-        for kw in forbidden:
-            # Check als heel woord (niet als deel van kolomnaam)
-            if re.search(rf"\b{kw}\b", sql_upper):
-                return f"Onveilige query gedetecteerd: {kw} is niet toegestaan."
-        if not (sql_upper.startswith("SELECT") or sql_upper.startswith("WITH")):
+        match = _FORBIDDEN_RE.search(sql)
+        if match:
+            return f"Onveilige query gedetecteerd: {match.group(1).upper()} is niet toegestaan."
+        if not _SQL_START_RE.match(sql):
             return "Query moet beginnen met SELECT of WITH."
         return None
 
     def _execute_sql(self, sql: str) -> tuple[list[str], list[tuple]]:
-        """Voer SQL uit en retourneer (kolommen, rijen)."""
-        conn = self._get_connection()
-        try:
-            cursor = conn.execute(sql)
-            columns = [desc[0] for desc in cursor.description] if cursor.description else []
-            rows = cursor.fetchall()
-            return columns, rows
-        finally:
-            conn.close()
+        """Voer SQL uit en retourneer (kolommen, rijen), met cache op de querytekst."""
+        cached = self._sql_cache.get(sql)
+        if cached is not None:
+            return cached
+        columns, rows = self._query(sql)
+        self._sql_cache.put(sql, (columns, rows))
+        return columns, rows
+
+    def _query(self, sql: str) -> tuple[list[str], list[tuple]]:
+        """Voer SQL daadwerkelijk uit op de database.
+
+        Een progress handler breekt de query af zodra QUERY_TIMEOUT verstreken is,
+        zodat een ontspoorde (LLM-gegenereerde) query de connectie niet blokkeert.
+        """
+        with self._conn_lock:
+            # Pas na het verkrijgen van de lock: wachten op andere queries telt niet mee
+            deadline = time.monotonic() + QUERY_TIMEOUT
+            self._conn.set_progress_handler(
+                lambda: 1 if time.monotonic() > deadline else 0, QUERY_PROGRESS_STEPS
+            )
+            try:
+                cursor = self._conn.execute(sql)
+                columns = [desc[0] for desc in cursor.description] if cursor.description else []
+                rows = cursor.fetchall()
+            except sqlite3.OperationalError as e:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(
+                        f"De query was te zwaar en is na {QUERY_TIMEOUT} seconden afgebroken."
+                    ) from e
+                raise
+            finally:
+                self._conn.set_progress_handler(None, 0)
+        return columns, rows
 
     def _format_results(self, columns: list[str], rows: list[tuple], max_rows: int = 50) -> str:
         """Formatteer resultaten als leesbare tekst voor de LLM."""
@@ -290,30 +482,165 @@ class DataEngine:
 
         return "\n".join(lines)
 
-    def _generate_answer(self, question: str, result_text: str) -> str:
+    async def _generate_answer(self, question: str, result_text: str) -> str:
         """Laat de LLM een natuurlijk-taal antwoord formuleren."""
-        response = self._llm.chat.completions.create(
+        parts = [part async for part in self._generate_answer_stream(question, result_text)]
+        return "".join(parts).strip()
+
+    async def _generate_answer_stream(self, question: str, result_text: str) -> AsyncIterator[str]:
+        """Laat de LLM een antwoord formuleren en geef de tekst door zodra die binnenkomt."""
+        stream = await self._llm.chat.completions.create(
             model=LLM_MODEL,
             messages=[
                 {"role": "system", "content": ANSWER_SYSTEM_PROMPT},
                 {"role": "user", "content": f"Vraag: {question}\n\nData:\n{result_text}"},
             ],
             temperature=0.3,
+            stream=True,
         )
-        return response.choices[0].message.content.strip()
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
 
     def ask_data(self, question: str) -> dict:
         """
-        Beantwoord een datavraag.
+        Beantwoord een datavraag (synchrone versie van ask_data_async).
 
         Returns:
             dict met 'answer', 'sql', 'data_table' (list of dicts), 'columns', 'error'
         """
+        return self._run(self._ask_data_async(question))
+
+    async def ask_data_async(self, question: str) -> dict:
+        """
+        Beantwoord een datavraag zonder de event loop van de aanroeper te blokkeren.
+
+        Kan vanaf elke event loop worden aangeroepen (bijv. met asyncio.gather): het
+        werk draait op de event loop van de engine, waar de gedeelde LLM-client bij hoort.
+
+        Returns:
+            dict met 'answer', 'sql', 'data_table' (list of dicts), 'columns', 'error'
+        """
+        future = asyncio.run_coroutine_threadsafe(self._ask_data_async(question), self._loop)
+        return await asyncio.wrap_future(future)
+
+    async def _ask_data_async(self, question: str) -> dict:
+        """ask_data_async, maar op de event loop van de engine zelf."""
+        key = _question_key(question)
+        cached = self._answer_cache.get(key)
+        if cached is not None:
+            return dict(cached)
+
+        result = await self._answer(question)
+        if not result["error"]:
+            self._answer_cache.put(key, result)
+        return dict(result)
+
+    def ask_data_stream(self, question: str) -> dict:
+        """
+        Beantwoord een datavraag met een streamend antwoord (voor st.write_stream).
+
+        SQL en data zijn direct beschikbaar; 'answer_stream' geeft de tekst van het
+        antwoord stukje bij stukje. Na afloop van de stream staat het volledige
+        antwoord ook in 'answer'.
+
+        Returns:
+            dict met 'answer_stream', 'answer', 'sql', 'data_table', 'columns', 'error'
+        """
+        key = _question_key(question)
+        cached = self._answer_cache.get(key)
+        if cached is not None:
+            result = dict(cached)
+            result["answer_stream"] = iter([result["answer"]])
+            return result
+
+        try:
+            result, result_text = self._run(
+                asyncio.wait_for(self._prepare(question), REQUEST_TIMEOUT)
+            )
+        except TimeoutError:
+            result, result_text = _timeout_result(), None
+        if result_text is None:
+            if not result["error"]:
+                self._answer_cache.put(key, result)
+            result = dict(result)
+            result["answer_stream"] = iter([result["answer"]])
+            return result
+
+        result["answer_stream"] = self._stream_answer(key, question, result_text, result)
+        return result
+
+    def _stream_answer(self, key: str, question: str, result_text: str,
+                       result: dict) -> Iterator[str]:
+        """Synchrone generator over de async LLM-stream op de event loop van de engine."""
+        stream = self._generate_answer_stream(question, result_text)
+        parts = []
+        try:
+            while True:
+                part = self._run(_next_or_none(stream))
+                if part is None:
+                    break
+                parts.append(part)
+                yield part
+        except Exception as e:
+            result["error"] = str(e)
+            result["answer"] = f"Er ging iets mis bij het beantwoorden van je datavraag: {e}"
+            yield result["answer"]
+            return
+        finally:
+            self._run(stream.aclose())
+
+        result["answer"] = "".join(parts).strip()
+        cached = {k: v for k, v in result.items() if k != "answer_stream"}
+        self._answer_cache.put(key, cached)
+
+    def ask_data_many(self, questions: list[str]) -> list[dict]:
+        """
+        Beantwoord een reeks datavragen gelijktijdig, bijv. voor evaluatie of feedback-replay.
+
+        Retourneert de resultaten in dezelfde volgorde als de vragen.
+        """
+        return self._run(self._ask_data_many(questions))
+
+    async def _ask_data_many(self, questions: list[str]) -> list[dict]:
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+        async def ask_one(question: str) -> dict:
+            async with semaphore:
+                return await self._ask_data_async(question)
+
+        return await asyncio.gather(*(ask_one(q) for q in questions))
+
+    async def _answer(self, question: str) -> dict:
+        """Doorloop de volledige pipeline: SQL genereren, uitvoeren, antwoord formuleren."""
+        try:
+            async with asyncio.timeout(REQUEST_TIMEOUT):
+                result, result_text = await self._prepare(question)
+                if result_text is None:
+                    return result
+
+                try:
+                    result["answer"] = await self._generate_answer(question, result_text)
+                except Exception as e:
+                    result["error"] = str(e)
+                    result["answer"] = f"Er ging iets mis bij het beantwoorden van je datavraag: {e}"
+        except TimeoutError:
+            return _timeout_result()
+
+        return result
+
+    async def _prepare(self, question: str) -> tuple[dict, str | None]:
+        """
+        Stap 1-3 van de pipeline: SQL genereren, valideren en uitvoeren.
+
+        Retourneert (result, result_text). result_text is de data voor de LLM,
+        of None als het antwoord al vaststaat (fout of template-antwoord).
+        """
         result = {"answer": "", "sql": "", "data_table": [], "columns": [], "error": None}
 
         try:
             # Stap 1: Genereer SQL
-            sql = self._generate_sql(question)
+            sql = await self._generate_sql(question)
             result["sql"] = sql
 
             # Stap 2: Valideer
@@ -321,42 +648,48 @@ class DataEngine:
             if error:
                 result["error"] = error
                 result["answer"] = error
-                return result
+                return result, None
 
             # Stap 3: Voer uit
-            try:
-                columns, rows = self._execute_sql(sql)
-            except Exception as e:
-                # Stap 3b: Bij fout, 1 retry met foutmelding
-                error_msg = str(e)
-                retry_prompt = (
-                    f"De vorige query gaf een fout:\n{error_msg}\n\n"
-                    f"Oorspronkelijke vraag: {question}\n\n"
-                    f"Genereer een correcte SQL query."
-                )
-                sql = self._generate_sql(retry_prompt)
-                result["sql"] = sql
-
-                error = self._validate_sql(sql)
-                if error:
-                    result["error"] = error
-                    result["answer"] = error
-                    return result
-
-                columns, rows = self._execute_sql(sql)
+            for attempt in range(self._max_retries + 1):
+                try:
+                    columns, rows = await asyncio.to_thread(self._execute_sql, sql)
+                    break
+                except TimeoutError:
+                    # Te zware query: een nieuwe poging kost alleen nog meer tijd
+                    raise
+                except Exception as e:
+                    if attempt == self._max_retries:
+                        raise
+                    # Stap 3b: Bij fout (bijv. onbekende kolom), nieuwe SQL met foutmelding
+                    retry_prompt = (
+                        f"De vorige query gaf een fout:\n{e}\n\n"
+                        f"Oorspronkelijke vraag: {question}\n\n"
+                        f"Genereer een correcte SQL query."
+                    )
+                    sql = await self._generate_sql(retry_prompt)
+                    result["sql"] = sql
+
+                    error = self._validate_sql(sql)
+                    if error:
+                        result["error"] = error
+                        result["answer"] = error
+                        return result, None
 
             result["columns"] = columns
             result["data_table"] = [dict(zip(columns, row)) for row in rows[:100]]
 
-            # Stap 4: Genereer antwoord
-            result_text = self._format_results(columns, rows)
-            result["answer"] = self._generate_answer(question, result_text)
+            # Stap 4 (deels): triviale resultaten via een vast template
+            answer = _try_template_answer(columns, rows)
+            if answer is not None:
+                result["answer"] = answer
+                return result, None
+            return result, self._format_results(columns, rows)
 
         except Exception as e:
             result["error"] = str(e)
             result["answer"] = f"Er ging iets mis bij het beantwoorden van je datavraag: {e}"
-
-        return result
+            return result, None
 
 
 if __name__ == "__main__":
@@ -371,11 +704,16 @@ if __name__ == "__main__":
             continue
 
         print("\nQuery wordt gegenereerd...\n")
-        result = engine.ask_data(question)
+        result = engine.ask_data_stream(question)
 
         print(f"SQL: {result['sql']}\n")
-        print(f"Antwoord: {result['answer']}")
+        print("Antwoord: ", end="", flush=True)
+        for part in result["answer_stream"]:
+            print(part, end="", flush=True)
+        print()
         if result["error"]:
             print(f"\nFout: {result['error']}")
         if result["data_table"]:
             print(f"\n({len(result['data_table'])} rijen data)")
+
+    engine.close()
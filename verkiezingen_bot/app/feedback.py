@@ -2,17 +2,33 @@
 Feedback opslag: Supabase (primair) met lokale CSV fallback.
 """
 
+import atexit
 import csv
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
 import requests
 import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Pad voor lokale fallback CSV
 FEEDBACK_CSV = Path(__file__).parent.parent / "data" / "feedback.csv"
 
+# Feedback wordt op de achtergrond opgeslagen zodat de UI niet op Supabase wacht
+_FEEDBACK_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="feedback")
+
+# Eén sessie voor alle Supabase-calls: TCP/TLS-verbindingen worden hergebruikt.
+# Retry herhaalt alleen verbindingsfouten; een POST wordt niet dubbel verstuurd.
+_SESSION = requests.Session()
+_SESSION.headers.update({"Content-Type": "application/json", "Prefer": "return=minimal"})
+_SESSION.mount("https://", HTTPAdapter(
+    pool_connections=4, pool_maxsize=8, max_retries=Retry(total=2, backoff_factor=0.2),
+))
+
 
 def _get_supabase_config():
     """Haal Supabase URL en key op uit st.secrets of environment."""
@@ -31,20 +47,18 @@ def _get_supabase_config():
     return url, key
 
 
-def _save_to_supabase(question: str, answer: str, rating: str, comment: str) -> bool:
+def _save_to_supabase(url: str, key: str, question: str, answer: str, rating: str,
+                      comment: str) -> bool:
     """Sla feedback op in Supabase. Retourneert True bij succes."""
-    url, key = _get_supabase_config()
     if not url or not key:
         return False
 
     try:
-        response = requests.post(
+        response = _SESSION.post(
             f"{url}/rest/v1/feedback",
             headers={
                 "apikey": key,
                 "Authorization": f"Bearer {key}",
-                "Content-Type": "application/json",
-                "Prefer": "return=minimal",
             },
             json={
                 "vraag": question,
@@ -60,24 +74,57 @@ def _save_to_supabase(question: str, answer: str, rating: str, comment: str) ->
         return False
 
 
+class _CsvLogger:
+    """Append-only CSV schrijver die het bestand open houdt zolang het proces leeft."""
+
+    FIELDS = ["Tijdstip", "Vraag", "Antwoord", "Beoordeling", "Toelichting"]
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._file = None
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self._path, "a", newline="", encoding="utf-8", buffering=1 << 16)
+        self._writer = csv.DictWriter(self._file, fieldnames=self.FIELDS)
+        if os.path.getsize(self._path) == 0:
+            self._writer.writeheader()
+        atexit.register(self.close)
+
+    def write(self, row: dict):
+        with self._lock:
+            if self._file is None:
+                self._open()
+            self._writer.writerow(row)
+            # Eén write per rij; zonder flush gaat feedback verloren als het proces wordt gekild
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+_csv_logger = _CsvLogger(FEEDBACK_CSV)
+
+
 def _save_to_csv(question: str, answer: str, rating: str, comment: str):
     """Lokale CSV fallback."""
-    FEEDBACK_CSV.parent.mkdir(parents=True, exist_ok=True)
-    file_exists = FEEDBACK_CSV.exists()
-
-    with open(FEEDBACK_CSV, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        if not file_exists:
-            writer.writerow(
-                ["Tijdstip", "Vraag", "Antwoord", "Beoordeling", "Toelichting"]
-            )
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        writer.writerow([timestamp, question, answer[:500], rating, comment])
+    _csv_logger.write({
+        "Tijdstip": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "Vraag": question,
+        "Antwoord": answer[:500],
+        "Beoordeling": rating,
+        "Toelichting": comment,
+    })
 
 
 def save_feedback(question: str, answer: str, rating: str, comment: str = ""):
     """
-    Sla feedback op. Probeert eerst Supabase, anders lokale CSV.
+    Sla feedback op zonder te blokkeren. Probeert eerst Supabase, anders lokale CSV.
 
     Args:
         question: De gestelde vraag
@@ -85,6 +132,16 @@ def save_feedback(question: str, answer: str, rating: str, comment: str = ""):
         rating: "positief" of "negatief"
         comment: Optionele toelichting van de gebruiker
     """
-    success = _save_to_supabase(question, answer, rating, comment)
-    if not success:
-        _save_to_csv(question, answer, rating, comment)
+    # Config hier ophalen: st.secrets hoort bij de Streamlit-thread
+    url, key = _get_supabase_config()
+    _FEEDBACK_EXECUTOR.submit(_do_save, url, key, question, answer, rating, comment)
+
+
+def _do_save(url: str, key: str, question: str, answer: str, rating: str, comment: str):
+    """Probeer Supabase, anders lokale CSV (draait op de feedback-thread)."""
+    try:
+        success = _save_to_supabase(url, key, question, answer, rating, comment)
+        if not success:
+            _save_to_csv(question, answer, rating, comment)
+    except Exception as e:
+        print(f"Feedback opslaan mislukt: {e}")
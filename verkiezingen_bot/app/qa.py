@@ -4,34 +4,75 @@ QA Backend: vraag-antwoord pipeline met bronvermelding.
 Vraag → hybride zoeken (FAISS + keyword) → re-rank → stuur naar LLM → antwoord.
 """
 
+import asyncio
+import atexit
+import bisect
+import hashlib
 import json
 import os
-import pickle
 import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable, Iterator
+from concurrent.futures import Future
+from functools import lru_cache
+from itertools import accumulate
 from pathlib import Path
 
 import faiss
 import numpy as np
+import torch
 from dotenv import load_dotenv
-from openai import OpenAI
-from sentence_transformers import CrossEncoder, SentenceTransformer
+from openai import AsyncOpenAI, DefaultAioHttpClient, DefaultHttpxClient, OpenAI
+from sentence_transformers import CrossEncoder
+
+from verkiezingen_bot.app.data_engine import _next_or_none
+from verkiezingen_bot.app.indexer import ONNX_MODEL_FILE, load_chunks, load_embedding_model
 
 # Laad .env
 load_dotenv(Path(__file__).parent.parent / ".env")
 
 INDEX_DIR = Path(__file__).parent.parent / "index"
 FAISS_INDEX_FILE = INDEX_DIR / "faiss.index"
-CHUNKS_FILE = INDEX_DIR / "chunks.pkl"
+ANSWER_CACHE_DIR = INDEX_DIR / "qacache"  # beantwoorde vragen, één JSON per vraag
+ANSWER_CACHE_TTL = 7 * 24 * 3600  # seconden
+ANSWER_CACHE_MAX_ENTRIES = 5000  # daarboven worden de oudste antwoorden verwijderd
+ANSWER_CACHE_PRUNE_INTERVAL = 100  # opschonen bij elke zoveelste nieuwe entry
 
 EMBEDDING_MODEL = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
 RERANKER_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
 
 # Retrieval instellingen
 RERANK_CANDIDATES = 25  # Breed ophalen voor re-ranking (lager = sneller op CPU)
+QUERY_CACHE_SIZE = 512  # aantal query-embeddings dat bewaard blijft (LRU)
+SEARCH_CACHE_SIZE = 512  # aantal zoekresultaten dat bewaard blijft (LRU)
+MAX_SEARCH_BATCH = 16  # maximaal aantal gelijktijdige vragen per search_batch
+KEYWORD_CACHE_SIZE = 4096  # aantal keyword-lookups dat bewaard blijft (LRU)
+# Als de beste FAISS-match duidelijk wint (cosine similarity), alleen de FAISS top_k
+# re-ranken in plaats van alle kandidaten
+RERANK_SKIP_MIN_SCORE = 0.80
+RERANK_SKIP_MARGIN = 0.15  # minimaal verschil met de tweede match
+
+# FAISS (OpenMP) en PyTorch starten elk standaard een threadpool ter grootte van alle
+# cores; samen in één proces overbelast dat de CPU. Beide krijgen de helft.
+CPU_THREADS = max(1, (os.cpu_count() or 2) // 2)
+faiss.omp_set_num_threads(CPU_THREADS)
+torch.set_num_threads(CPU_THREADS)
 
 # LLM configuratie — OpenRouter met DeepSeek V3.2 (open-source)
 LLM_MODEL = "deepseek/deepseek-v3.2"
 LLM_BASE_URL = "https://openrouter.ai/api/v1"
+# Opties voor elke antwoord-call. max_tokens begrenst de decodeertijd (ruim boven een
+# uitgebreid antwoord); OpenRouter routeert naar de provider met de hoogste
+# doorvoer (tokens/s) en valt bij storing terug op de andere providers.
+LLM_OPTIONS = {
+    "temperature": 0.3,
+    "max_tokens": 1024,
+    "extra_body": {"provider": {"sort": "throughput"}},
+}
+# ask_batch: zoveel vragen delen één LLM-aanroep; meer gaat ten koste van de kwaliteit
+LLM_BATCH_SIZE = 4
 
 
 def _get_api_key():
@@ -45,6 +86,63 @@ def _get_api_key():
             pass
     return key
 
+
+# Eén client per proces, gedeeld door alle engines (Streamlit-sessies): de
+# HTTP/2-verbinding naar OpenRouter en de TLS-sessie worden hergebruikt
+_llm_client = None
+_llm_client_lock = threading.Lock()
+
+
+def _get_llm_client() -> OpenAI:
+    """Gedeelde OpenAI-client, aangemaakt bij het eerste gebruik."""
+    global _llm_client
+    with _llm_client_lock:
+        if _llm_client is None:
+            _llm_client = OpenAI(
+                base_url=LLM_BASE_URL,
+                api_key=_get_api_key(),
+                http_client=DefaultHttpxClient(http2=True),
+            )
+    return _llm_client
+
+
+# Eén event loop (in een eigen thread) met één async client voor het hele proces: een
+# aiohttp-sessie hoort bij de loop waarop hij draait. Met een client per aanroepende loop
+# bleef bij elke asyncio.run() een open sessie achter. Aanroepers op andere loops
+# wachten via asyncio.wrap_future, net als bij DataEngine.
+_async_llm_loop: asyncio.AbstractEventLoop | None = None
+_async_llm_client: AsyncOpenAI | None = None
+_async_llm_lock = threading.Lock()
+
+
+def _get_async_llm() -> tuple[asyncio.AbstractEventLoop, AsyncOpenAI]:
+    """Gedeelde LLM-loop en async client, aangemaakt bij het eerste gebruik."""
+    global _async_llm_loop, _async_llm_client
+    with _async_llm_lock:
+        if _async_llm_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="llm-loop", daemon=True).start()
+            _async_llm_client = AsyncOpenAI(
+                base_url=LLM_BASE_URL, api_key=_get_api_key(), http_client=DefaultAioHttpClient()
+            )
+            _async_llm_loop = loop
+            atexit.register(_close_async_llm)
+    return _async_llm_loop, _async_llm_client
+
+
+def _close_async_llm():
+    """Sluit de async client netjes af bij het afsluiten van het proces."""
+    asyncio.run_coroutine_threadsafe(_async_llm_client.close(), _async_llm_loop).result(
+        timeout=5
+    )
+
+
+async def _on_llm_loop(coro):
+    """Voer een coroutine uit op de LLM-loop en wacht erop vanaf de huidige loop."""
+    loop, _ = _get_async_llm()
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
 TOP_K = 10
 MAX_CONTEXT_CHARS = 12000
 MIN_SCORE = 0.30
@@ -62,6 +160,382 @@ REGELS:
 8. De Toolkit gaat UITSLUITEND over de gemeenteraadsverkiezingen 2026. Als een vraag over andere verkiezingen gaat (Europees Parlement, Tweede Kamer, Provinciale Staten, waterschappen), meld dan dat je alleen informatie hebt over de gemeenteraadsverkiezingen 2026.
 9. Als de gebruiker een term gebruikt die niet in de bronnen voorkomt (bijv. 'kiezerspas' in plaats van 'stempas'), wijs hier dan op in plaats van de term klakkeloos over te nemen."""
 
+# Eén keer opgebouwd; elke LLM-call begint met exact dezelfde prefix
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+
+# Stopwoorden die niet als zoekterm meetellen
+_STOPWORDS = frozenset({
+    "de", "het", "een", "van", "in", "is", "op", "te", "dat", "die",
+    "er", "en", "voor", "aan", "met", "als", "om", "bij", "ook",
+    "nog", "wel", "niet", "maar", "dan", "wat", "hoe", "wie", "waar",
+    "wanneer", "hoeveel", "welk", "welke", "kan", "kun", "moet",
+    "worden", "wordt", "zijn", "ben", "was", "werd", "heeft", "hebben",
+    "ik", "je", "we", "ze", "dit", "deze", "die", "daar", "hier",
+    "zo", "al", "naar", "over", "door", "tot", "uit",
+})
+# Modelnummers als geheel (bijv. "N 10-2", "Na 31-1", "I 4", "L 8"). Zonder "model" of
+# "formulier" ervoor alleen met hoofdletter, anders is "na 17 uur" ook een modelnummer.
+# Een getal gevolgd door "." of ":" en een cijfer is een tijd of bedrag ("Na 17.00 uur").
+_MODEL_RE = re.compile(
+    r"(?:\b(?i:model|formulier)\s+(?i:([a-z]a?))|\b([A-Z]a?))\s+(\d+(?:-\d+)*)\b(?![.:,]\d)"
+)
+_WORD_RE = re.compile(r"[a-zA-Z0-9À-ÿ][\w\-]*")
+
+# Slotregel van het LLM-antwoord; wordt tijdens het streamen niet getoond
+_PASSAGES_MARKER = "GEBRUIKTE PASSAGES:"
+
+# Tokens in de keyword-index: aaneengesloten woordtekens en koppeltekens, de tekens
+# waaruit keywords bestaan. Al het andere (witruimte, leestekens, \x00) scheidt.
+_TOKEN_SPLIT_RE = re.compile(r"[^\w\-]+")
+
+
+def _is_passages_line(line: str, complete: bool = True) -> bool:
+    """True als `line` de GEBRUIKTE PASSAGES-regel is (of, onafgerond, nog kan worden)."""
+    head = line.lstrip(" *#").upper()
+    if complete:
+        return head.startswith(_PASSAGES_MARKER)
+    return _PASSAGES_MARKER.startswith(head[:len(_PASSAGES_MARKER)])
+
+
+class _AnswerFilter:
+    """
+    Filtert een gestreamd LLM-antwoord voor weergave: tekst gaat direct door, behalve
+    de GEBRUIKTE PASSAGES-regel (en alles daarna). Het volledige antwoord blijft in `text`.
+    """
+
+    def __init__(self):
+        self._parts = []
+        self._line = ""  # huidige, nog niet afgesloten regel
+        self._shown = 0  # deel van `_line` dat al getoond is
+        self._visible = True  # False zodra de GEBRUIKTE PASSAGES-regel begint
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    def feed(self, delta: str | None) -> str:
+        """Voeg een stuk antwoord toe; geeft de tekst die nu getoond kan worden."""
+        if not delta:
+            return ""
+        self._parts.append(delta)
+        if not self._visible:
+            return ""
+
+        # Afgeronde regels direct tonen, behalve de passages-regel
+        out = []
+        *complete, self._line = (self._line + delta).split("\n")
+        for full in complete:
+            if self._shown == 0 and _is_passages_line(full):
+                self._visible = False
+                return "".join(out)
+            out.append(full[self._shown:] + "\n")
+            self._shown = 0
+        # Een begonnen regel tonen zodra duidelijk is dat het geen passages-regel is
+        if len(self._line) > self._shown and (
+            self._shown or not _is_passages_line(self._line, complete=False)
+        ):
+            out.append(self._line[self._shown:])
+            self._shown = len(self._line)
+        return "".join(out)
+
+    def finish(self) -> str:
+        """Rest van de laatste regel, als die getoond mag worden."""
+        if not self._visible or len(self._line) <= self._shown:
+            return ""
+        if self._shown == 0 and _is_passages_line(self._line):
+            return ""
+        return self._line[self._shown:]
+
+
+async def _aiter_once(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+def _delta_text(event) -> str | None:
+    """Tekst uit één streaming chunk van de chat API."""
+    return event.choices[0].delta.content if event.choices else None
+
+
+def _faiss_dominates(distances: np.ndarray, indices: np.ndarray,
+                     keyword_results: list[tuple[int, float]]) -> bool:
+    """True als de beste FAISS-match zo duidelijk wint dat de keyword-kandidaten niets toevoegen.
+
+    De match moet hoog scoren, ruim boven de tweede uitkomen en ook via de
+    keywords gevonden zijn.
+    """
+    if len(indices) == 0 or indices[0] < 0:
+        return False
+    top = distances[0]
+    runner_up = distances[1] if len(indices) > 1 and indices[1] >= 0 else -np.inf
+    return (
+        top > RERANK_SKIP_MIN_SCORE
+        and top - runner_up > RERANK_SKIP_MARGIN
+        and any(idx == indices[0] for idx, _ in keyword_results)
+    )
+
+
+def _normalize_query(query: str) -> str:
+    """Cachesleutel voor een vraag: witruimte samengevoegd (de tokenizer negeert die).
+
+    Hoofdletters blijven staan: het embedding-model en de re-ranker zijn hoofdlettergevoelig.
+    """
+    return " ".join(query.split())
+
+
+def _model_codes(text: str) -> list[str]:
+    """Modelnummers in `text`, genormaliseerd zoals keywords ze gebruiken ("n 10-2")."""
+    return [f"{prefixed or bare} {num}".lower() for prefixed, bare, num in _MODEL_RE.findall(text)]
+
+
+def _index_model_codes(chunks: list[dict]) -> dict[str, np.ndarray]:
+    """Modelnummer -> indices van de chunks van de pagina over dat model.
+
+    Alleen titels als "Model N 10-2 (...)" of "Formulier J 8 (...)" tellen; een nummer dat
+    in de titels van meer dan één pagina staat, is niet eenduidig en wordt overgeslagen.
+    """
+    pages: dict[str, dict[str, list[int]]] = {}
+    for i, chunk in enumerate(chunks):
+        titel = chunk.get("titel", "")
+        match = _MODEL_RE.match(titel)
+        if match and match.group(1):
+            code = _model_codes(match.group(0))[0]
+            pages.setdefault(code, {}).setdefault(titel, []).append(i)
+    return {
+        code: np.array(indices, dtype=np.int64)
+        for code, by_title in pages.items()
+        if len(by_title) == 1
+        for indices in by_title.values()
+    }
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Posities van de k hoogste scores, aflopend gesorteerd.
+
+    Gelijk aan np.argsort(-scores, kind="stable")[:k] (bij gelijke score de laagste
+    positie eerst), maar met een O(n) partitie in plaats van een volledige sortering.
+    """
+    n = len(scores)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+    kth = np.partition(scores, n - k)[n - k]
+    # Alle scores >= de k-de hoogste, inclusief gelijke waarden op de grens
+    candidates = np.flatnonzero(scores >= kth)
+    return candidates[np.argsort(-scores[candidates], kind="stable")][:k]
+
+
+class _KeywordIndex:
+    """
+    Inverted index voor keyword-zoeken in text, titel en heading van de chunks.
+
+    Behoudt de substring-semantiek van `kw in tekst`: een keyword dat alleen uit
+    tokentekens bestaat valt altijd binnen één token, dus we zoeken het keyword in
+    de vocabulaire (één C-scan over een blob) in plaats van in elke chunk. Overige
+    keywords (modelnummers als "n 10-2") worden via hun langste deel
+    voorgeselecteerd en daarna exact gecontroleerd.
+    """
+
+    def __init__(self, chunks: list[dict]):
+        # Velden gescheiden door \x00 zodat een match nooit over twee velden loopt
+        self._haystacks = [
+            "\x00".join((
+                chunk["text"].lower(),
+                chunk.get("titel", "").lower(),
+                chunk.get("heading", "").lower(),
+            ))
+            for chunk in chunks
+        ]
+
+        postings: dict[str, list[int]] = {}
+        for i, haystack in enumerate(self._haystacks):
+            for token in set(_TOKEN_SPLIT_RE.split(haystack)):
+                if token:
+                    postings.setdefault(token, []).append(i)
+
+        vocab = list(postings)
+        self._postings = [np.array(postings[token], dtype=np.int32) for token in vocab]
+        self._vocab_blob = "\n".join(vocab)
+        self._token_starts = []
+        pos = 0
+        for token in vocab:
+            self._token_starts.append(pos)
+            pos += len(token) + 1
+
+        # Dezelfde keywords komen in veel vragen terug; de vocabulaire-scan is het
+        # duurste deel van een lookup, dus resultaten worden per keyword bewaard
+        self.lookup = lru_cache(maxsize=KEYWORD_CACHE_SIZE)(self._lookup)
+
+    def _lookup_token(self, piece: str) -> np.ndarray:
+        """Chunks met een token dat `piece` bevat (piece zonder witruimte)."""
+        token_ids = set()
+        pos = self._vocab_blob.find(piece)
+        while pos != -1:
+            token_ids.add(bisect.bisect_right(self._token_starts, pos) - 1)
+            pos = self._vocab_blob.find(piece, pos + 1)
+        if not token_ids:
+            return np.empty(0, dtype=np.int32)
+        return np.unique(np.concatenate([self._postings[t] for t in token_ids]))
+
+    def _lookup(self, keyword: str) -> np.ndarray:
+        """Gesorteerde indices van alle chunks waarin `keyword` voorkomt."""
+        result = self._find(keyword)
+        # Gecachet resultaat wordt gedeeld tussen aanroepen: niet muteerbaar
+        result.flags.writeable = False
+        return result
+
+    def _find(self, keyword: str) -> np.ndarray:
+        pieces = [p for p in _TOKEN_SPLIT_RE.split(keyword) if p]
+        if not pieces:
+            return np.array(
+                [i for i, h in enumerate(self._haystacks) if keyword in h], dtype=np.int32
+            )
+        candidates = self._lookup_token(max(pieces, key=len))
+        if len(pieces) == 1 and pieces[0] == keyword:
+            return candidates
+        return np.array(
+            [i for i in candidates if keyword in self._haystacks[i]], dtype=np.int32
+        )
+
+
+class _AnswerCache:
+    """
+    Schijfcache met volledige antwoorden ({answer, sources, chunks}) per vraag.
+
+    De sleutel bevat het LLM-model en de mtime van de FAISS index, dus na een
+    nieuwe index of een ander model worden oude antwoorden niet meer gebruikt.
+    Verlopen bestanden worden bij het lezen verwijderd; bij de eerste en daarna elke
+    ANSWER_CACHE_PRUNE_INTERVAL-ste nieuwe entry ruimt prune() de map op.
+    """
+
+    def __init__(self, directory: Path = ANSWER_CACHE_DIR, ttl: float = ANSWER_CACHE_TTL,
+                 max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        self._dir = directory
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._puts = 0
+        self._puts_lock = threading.Lock()
+
+    def key(self, question: str) -> str:
+        try:
+            index_mtime = FAISS_INDEX_FILE.stat().st_mtime_ns
+        except OSError:
+            index_mtime = 0
+        raw = f"{_normalize_query(question).lower()}\x00{LLM_MODEL}\x00{index_mtime}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        path = self._dir / f"{key}.json"
+        try:
+            if time.time() - path.stat().st_mtime > self._ttl:
+                path.unlink(missing_ok=True)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: str, value: dict):
+        path = self._dir / f"{key}.json"
+        # Eerst naar een tijdelijk bestand, zodat een lezer nooit een half bestand ziet
+        tmp = self._dir / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            self._dir.mkdir(parents=True, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except (OSError, TypeError) as e:
+            print(f"Antwoord niet gecachet: {e}")
+            tmp.unlink(missing_ok=True)
+            return
+
+        with self._puts_lock:
+            prune = self._puts % ANSWER_CACHE_PRUNE_INTERVAL == 0
+            self._puts += 1
+        if prune:
+            self.prune()
+
+    def prune(self):
+        """Verwijder verlopen antwoorden en, boven max_entries, de oudste."""
+        now = time.time()
+        entries = []
+        try:
+            with os.scandir(self._dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".json"):
+                        continue
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        pass  # intussen door een ander proces verwijderd
+        except OSError:
+            return
+        entries.sort(reverse=True)
+        for i, (mtime, path) in enumerate(entries):
+            if i >= self._max_entries or now - mtime > self._ttl:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+class _SearchBatcher:
+    """
+    Bundelt gelijktijdige zoekvragen uit verschillende threads (Streamlit-sessies) tot
+    één search_batch-aanroep: één encode-, FAISS- en re-rankbatch.
+
+    Er is geen wachtvenster en geen worker-thread. Een losse vraag wordt direct in de
+    thread van de aanroeper gezocht. Vragen die binnenkomen terwijl een batch loopt,
+    wachten op de lock; wie hem daarna krijgt, zoekt alle wachtende vragen in één batch.
+    """
+
+    def __init__(self, search_batch: Callable[[list[str], int], list[list[dict]]]):
+        self._search_batch = search_batch
+        self._pending: list[tuple[str, int, Future]] = []
+        self._pending_lock = threading.Lock()
+        self._batch_lock = threading.Lock()
+
+    def search(self, query: str, top_k: int) -> list[dict]:
+        future = Future()
+        with self._pending_lock:
+            self._pending.append((query, top_k, future))
+        while not future.done():
+            with self._batch_lock:
+                if future.done():
+                    break
+                with self._pending_lock:
+                    batch = self._pending[:MAX_SEARCH_BATCH]
+                    del self._pending[:MAX_SEARCH_BATCH]
+                self._run(batch)
+        return future.result()
+
+    def _run(self, batch: list[tuple[str, int, Future]]):
+        by_top_k: dict[int, list[tuple[str, Future]]] = {}
+        for query, top_k, future in batch:
+            by_top_k.setdefault(top_k, []).append((query, future))
+        for top_k, items in by_top_k.items():
+            try:
+                results = self._search_batch([query for query, _ in items], top_k)
+            except Exception as e:
+                for _, future in items:
+                    future.set_exception(e)
+                continue
+            for (_, future), result in zip(items, results):
+                future.set_result(result)
+
+
+def _load_reranker() -> CrossEncoder:
+    """Laad de re-ranker via ONNX Runtime (int8), met PyTorch als fallback."""
+    try:
+        return CrossEncoder(
+            RERANKER_MODEL, backend="onnx", model_kwargs={"file_name": ONNX_MODEL_FILE}
+        )
+    except Exception as e:
+        print(f"ONNX re-ranker niet beschikbaar ({e}), val terug op PyTorch")
+        return CrossEncoder(RERANKER_MODEL)
+
 
 class QAEngine:
     """Vraag-antwoord engine met RAG."""
@@ -71,118 +545,223 @@ class QAEngine:
         self._reranker = None
         self._index = None
         self._chunks = None
-        self._llm = OpenAI(base_url=LLM_BASE_URL, api_key=_get_api_key())
+        self._keyword_index = None
+        self._model_chunks = None
+        # Query-embeddings van eerdere (of opnieuw verstuurde) vragen
+        self._query_cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        # Zoekresultaten per (vraag, top_k) als lijst van (chunk_index, score)
+        self._search_cache: OrderedDict[tuple[str, int], list[tuple[int, float]]] = OrderedDict()
+        self._search_cache_lock = threading.Lock()
+        self._search_batcher = _SearchBatcher(self.search_batch)
+        self._llm = _get_llm_client()
+        self._answer_cache = _AnswerCache()
 
     def _load(self):
         """Lazy loading van model, re-ranker en index."""
         if self._model is None:
             print("Laden embedding model...")
-            self._model = SentenceTransformer(EMBEDDING_MODEL)
+            self._model = load_embedding_model(EMBEDDING_MODEL)
 
         if self._reranker is None:
             print("Laden re-ranker model...")
-            self._reranker = CrossEncoder(RERANKER_MODEL)
+            self._reranker = _load_reranker()
 
         if self._index is None:
             print("Laden FAISS index...")
-            self._index = faiss.read_index(str(FAISS_INDEX_FILE))
-            with open(CHUNKS_FILE, "rb") as f:
-                self._chunks = pickle.load(f)
-
-    def _extract_keywords(self, query: str) -> list[str]:
-        """Haal belangrijke zoektermen uit de vraag."""
-        stopwoorden = {
-            "de", "het", "een", "van", "in", "is", "op", "te", "dat", "die",
-            "er", "en", "voor", "aan", "met", "als", "om", "bij", "ook",
-            "nog", "wel", "niet", "maar", "dan", "wat", "hoe", "wie", "waar",
-            "wanneer", "hoeveel", "welk", "welke", "kan", "kun", "moet",
-            "worden", "wordt", "zijn", "ben", "was", "werd", "heeft", "hebben",
-            "ik", "je", "we", "ze", "dit", "deze", "die", "daar", "hier",
-            "zo", "al", "naar", "over", "door", "tot", "uit",
-        }
-        keywords = []
-
-        # Herken modelnummers als geheel (bijv. "N 10-2", "Na 31-1", "I 4", "L 8")
-        model_pattern = re.findall(
-            r"\b([A-Z](?:a)?)\s+(\d[\d\-]*)\b", query, re.IGNORECASE
-        )
-        for letter, num in model_pattern:
-            keywords.append(f"{letter.upper()} {num}".lower())
+            # Memory-mapped: vectors worden pas bij gebruik ingelezen en de pagina's
+            # worden gedeeld tussen processen die dezelfde index openen
+            self._index = faiss.read_index(
+                str(FAISS_INDEX_FILE), faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+            )
+            self._chunks = load_chunks()
+            self._keyword_index = _KeywordIndex(self._chunks)
+            self._model_chunks = _index_model_codes(self._chunks)
+
+    def warmup(self):
+        """Laad modellen en index vooraf en draai beide modellen één keer.
+
+        De eerste aanroep van een ONNX-sessie is trager (geheugen, kernels); zo betaalt
+        de eerste gebruiker daar niet voor.
+        """
+        self._load()
+        self._model.encode(["warmup"], normalize_embeddings=True, convert_to_numpy=True)
+        self._reranker.predict([("warmup", "warmup")])
+
+    def _extract_keywords(self, query: str) -> tuple[list[str], list[str]]:
+        """Haal belangrijke zoektermen uit de vraag.
+
+        Returns:
+            tuple van (keywords, modelnummers); modelnummers staan ook in keywords
+        """
+        # Herken modelnummers als geheel
+        keywords = list(dict.fromkeys(_model_codes(query)))
+        model_codes = list(keywords)
 
         # Overige woorden
-        woorden = re.findall(r"[a-zA-Z0-9À-ÿ][\w\-]*", query.lower())
-        for w in woorden:
-            if w not in stopwoorden and len(w) > 1 and w not in keywords:
+        seen = set(keywords)
+        for w in _WORD_RE.findall(query.lower()):
+            if w not in _STOPWORDS and len(w) > 1 and w not in seen:
+                seen.add(w)
                 keywords.append(w)
 
-        return keywords
+        return keywords, model_codes
+
+    def _model_page_hits(
+        self, model_codes: list[str], keywords: list[str], top_k: int
+    ) -> list[tuple[int, float]] | None:
+        """Top_k voor een vraag over één bekend modelnummer, zonder modellen.
 
-    def _keyword_search(self, keywords: list[str], top_k: int) -> list[dict]:
-        """Zoek chunks die query-keywords bevatten."""
+        Alleen de chunks van de pagina over dat model komen in aanmerking; ze worden
+        gerangschikt op de fractie matchende keywords, net als bij keyword zoeken.
+        Embedding, FAISS en re-ranker zijn dan niet nodig. Geeft None als de vraag
+        geen of meer dan één bekend modelnummer noemt.
+        """
+        known = [code for code in model_codes if code in self._model_chunks]
+        if len(known) != 1:
+            return None
+        page = self._model_chunks[known[0]]
+        matches = self._keyword_matches(keywords)[page]
+        best = _top_k(matches, top_k)
+        return [(int(idx), float(m) / len(keywords)) for idx, m in zip(page[best], matches[best])]
+
+    def _keyword_matches(self, keywords: list[str]) -> np.ndarray:
+        """Aantal keywords dat in elke chunk voorkomt."""
+        if not keywords:
+            return np.zeros(len(self._chunks), dtype=np.int64)
+        return np.bincount(
+            np.concatenate([self._keyword_index.lookup(kw) for kw in keywords]),
+            minlength=len(self._chunks),
+        )
+
+    def _keyword_search(self, keywords: list[str], top_k: int) -> list[tuple[int, float]]:
+        """Zoek chunks die query-keywords bevatten.
+
+        Returns:
+            lijst van (chunk_index, score), score = fractie van matchende keywords
+        """
         if not keywords:
             return []
 
-        scored = []
-        for i, chunk in enumerate(self._chunks):
-            text_lower = chunk["text"].lower()
-            titel_lower = chunk.get("titel", "").lower()
-            heading_lower = chunk.get("heading", "").lower()
-
-            matches = 0
-            for kw in keywords:
-                if kw in text_lower or kw in titel_lower or kw in heading_lower:
-                    matches += 1
-
-            if matches > 0:
-                # Score: fractie van matchende keywords
-                score = matches / len(keywords)
-                result = chunk.copy()
-                result["score"] = score
-                result["_chunk_idx"] = i
-                scored.append(result)
-
-        # Sorteer op score (meer matches = hoger)
-        scored.sort(key=lambda x: x["score"], reverse=True)
-        return scored[:top_k]
+        matches = self._keyword_matches(keywords)
+        hits = np.flatnonzero(matches)
+        # Sorteer op score (meer matches = hoger), bij gelijke score in chunk-volgorde
+        hits = hits[_top_k(matches[hits], top_k)]
+        return [(int(i), float(matches[i]) / len(keywords)) for i in hits]
+
+    def _encode_queries(self, queries: list[str]) -> np.ndarray:
+        """Embed queries in één batch; eerder geziene queries komen uit de cache."""
+        keys = [_normalize_query(q) for q in queries]
+        with self._query_cache_lock:
+            cached = {k: self._query_cache[k] for k in keys if k in self._query_cache}
+            for k in cached:
+                self._query_cache.move_to_end(k)
+
+        missing = list(dict.fromkeys(k for k in keys if k not in cached))
+        if missing:
+            embeddings = self._model.encode(
+                missing, batch_size=len(missing), normalize_embeddings=True,
+                convert_to_numpy=True,
+            ).astype(np.float32, copy=False)
+            with self._query_cache_lock:
+                for k, emb in zip(missing, embeddings):
+                    cached[k] = emb
+                    self._query_cache[k] = emb
+                while len(self._query_cache) > QUERY_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+
+        return np.stack([cached[k] for k in keys])
 
     def search(self, query: str, top_k: int = TOP_K) -> list[dict]:
-        """Hybride zoeken + re-ranking voor maximale precisie."""
+        """Hybride zoeken + re-ranking voor maximale precisie.
+
+        Gelijktijdige aanroepen uit andere threads worden samen in één batch gezocht.
+        """
+        return self._search_batcher.search(query, top_k)
+
+    def search_batch(self, queries: list[str], top_k: int = TOP_K) -> list[list[dict]]:
+        """Zoek voor meerdere vragen tegelijk: één encode-, FAISS- en re-rank-batch.
+
+        Eerder gezochte vragen komen uit de zoekcache (chunk-indices en scores).
+        """
         self._load()
+        keys = [(_normalize_query(q), top_k) for q in queries]
+        with self._search_cache_lock:
+            cached = {k: self._search_cache[k] for k in keys if k in self._search_cache}
+            for k in cached:
+                self._search_cache.move_to_end(k)
 
-        # 1. Semantisch zoeken — breed net ophalen
-        query_embedding = self._model.encode(
-            [query], normalize_embeddings=True
-        ).astype(np.float32)
-        distances, indices = self._index.search(
-            query_embedding, RERANK_CANDIDATES
-        )
+        missing = list(dict.fromkeys(k for k in keys if k not in cached))
+        if missing:
+            hits = self._search_hits([q for q, _ in missing], top_k)
+            with self._search_cache_lock:
+                for k, h in zip(missing, hits):
+                    cached[k] = h
+                    self._search_cache[k] = h
+                while len(self._search_cache) > SEARCH_CACHE_SIZE:
+                    self._search_cache.popitem(last=False)
+
+        # Elke aanroep krijgt eigen dicts; de cache bevat alleen (index, score)
+        return [
+            [{**self._chunks[idx], "score": score} for idx, score in cached[k]] for k in keys
+        ]
 
-        candidate_indices = set()
-        for idx in indices[0]:
-            candidate_indices.add(int(idx))
+    def _search_hits(self, queries: list[str], top_k: int) -> list[list[tuple[int, float]]]:
+        """Hybride zoeken + re-ranking; per vraag de top_k als (chunk_index, score).
 
-        # 2. Keyword zoeken — vult gaten aan die semantisch mist
-        keywords = self._extract_keywords(query)
-        keyword_results = self._keyword_search(keywords, RERANK_CANDIDATES)
-        for r in keyword_results:
-            candidate_indices.add(r["_chunk_idx"])
+        De score komt van de re-ranker, behalve bij een vraag over één bekend
+        modelnummer: die wordt direct op de modelpagina beantwoord en scoort de fractie
+        matchende keywords (ook 0-1).
+        """
+        results: list[list[tuple[int, float]] | None] = [None] * len(queries)
+
+        # 1. Keyword zoeken — vult gaten aan die semantisch mist. Een vraag over één
+        # bekend modelnummer is hiermee al klaar: de modelpagina is het antwoord.
+        pending = []
+        for i, query in enumerate(queries):
+            keywords, model_codes = self._extract_keywords(query)
+            results[i] = self._model_page_hits(model_codes, keywords, top_k)
+            if results[i] is None:
+                pending.append((i, query, self._keyword_search(keywords, RERANK_CANDIDATES)))
+        if not pending:
+            return results
 
-        # 3. Re-rank alle kandidaten met cross-encoder
-        candidate_list = list(candidate_indices)
+        # 2. Semantisch zoeken — breed net ophalen
+        query_embeddings = self._encode_queries([query for _, query, _ in pending])
+        distances, indices = self._index.search(query_embeddings, RERANK_CANDIDATES)
+
+        # Unie van semantische (-1 = geen resultaat) en keyword-kandidaten als
+        # gesorteerde array. Bij een duidelijke winnaar alleen de FAISS top_k.
+        rerank = []
+        candidate_lists = []
+        for (i, query, keyword_results), dist, row in zip(pending, distances, indices):
+            found = row >= 0
+            rerank.append((i, query))
+            if _faiss_dominates(dist, row, keyword_results):
+                candidate_lists.append(row[found][:top_k])
+                continue
+            keyword_indices = np.fromiter(
+                (idx for idx, _ in keyword_results), dtype=np.int64, count=len(keyword_results)
+            )
+            candidate_lists.append(np.union1d(row[found], keyword_indices))
+
+        # 3. Re-rank alle kandidaten van alle vragen met cross-encoder
         pairs = [
-            (query, self._chunks[idx]["text"]) for idx in candidate_list
+            (query, self._chunks[idx]["text"])
+            for (_, query), candidate_list in zip(rerank, candidate_lists)
+            for idx in candidate_list.tolist()
         ]
-        rerank_scores = self._reranker.predict(pairs)
-
-        # 4. Combineer en sorteer op re-rank score
-        combined = []
-        for idx, score in zip(candidate_list, rerank_scores):
-            chunk = self._chunks[idx].copy()
-            chunk["score"] = float(score)
-            combined.append(chunk)
+        # Eén batch voor alle paren, zodat alle CPU-threads tegelijk rekenen
+        rerank_scores = self._reranker.predict(pairs, batch_size=max(len(pairs), 1))
 
-        combined.sort(key=lambda x: x["score"], reverse=True)
-        return combined[:top_k]
+        # 4. Sorteer per vraag op re-rank score
+        offset = 0
+        for (i, _), candidate_list in zip(rerank, candidate_lists):
+            scores = np.asarray(rerank_scores[offset:offset + len(candidate_list)])
+            offset += len(candidate_list)
+            best = _top_k(scores, top_k)
+            results[i] = list(zip(candidate_list[best].tolist(), scores[best].tolist()))
+        return results
 
     def build_context(self, chunks: list[dict]) -> tuple[str, int]:
         """Bouw de context-tekst op uit genummerde chunks, beperkt tot MAX_CONTEXT_CHARS.
@@ -190,43 +769,37 @@ class QAEngine:
         Returns:
             tuple van (context_tekst, aantal_chunks_in_context)
         """
-        context_parts = []
-        total_chars = 0
-        chunks_included = 0
-        for i, chunk in enumerate(chunks, 1):
-            part = f"[{i}]\n{chunk['text']}\n"
-            if total_chars + len(part) > MAX_CONTEXT_CHARS:
-                break
-            context_parts.append(part)
-            total_chars += len(part)
-            chunks_included = i
-        return "\n".join(context_parts), chunks_included
+        # Lengte van elk deel "[i]\n<tekst>\n" zonder het deel zelf op te bouwen;
+        # de cumulatieve som bepaalt in één bisect hoeveel chunks erin passen
+        cumulative = list(accumulate(
+            len(str(i)) + len(chunk["text"]) + 4 for i, chunk in enumerate(chunks, 1)
+        ))
+        chunks_included = bisect.bisect_right(cumulative, MAX_CONTEXT_CHARS)
+        context = "\n".join(
+            f"[{i}]\n{chunk['text']}\n"
+            for i, chunk in enumerate(chunks[:chunks_included], 1)
+        )
+        return context, chunks_included
 
     def _get_sources_by_indices(self, chunks: list[dict], indices: list[int]) -> list[dict]:
         """Verzamel bronnen op basis van passage-nummers die de LLM heeft aangegeven.
 
         Deduplicatie per unieke pagina (bron_url zonder fragment).
         """
-        seen = set()
-        sources = []
-        for idx in indices:
-            if idx < 0 or idx >= len(chunks):
-                continue
-            chunk = chunks[idx]
-            url = chunk.get("bron_url", "")
-            if not url:
-                continue
-            # Dedupliceer op basis-URL (zonder # fragment)
-            base_url = url.split("#")[0]
-            if base_url in seen:
-                continue
-            seen.add(base_url)
-            sources.append({
-                "titel": chunk["titel"],
-                "url": url,
-                "sectie": chunk.get("sectie", ""),
-            })
-        return sources
+        used = [chunks[idx] for idx in indices
+                if 0 <= idx < len(chunks) and chunks[idx].get("bron_url")]
+        # Dedupliceer op basis-URL (zonder # fragment): dict.fromkeys houdt de volgorde
+        # aan, en via reversed() wint per pagina de eerst genoemde chunk
+        base_urls = [chunk["bron_url"].split("#")[0] for chunk in used]
+        first = dict(zip(reversed(base_urls), reversed(used)))
+        return [
+            {
+                "titel": first[base_url]["titel"],
+                "url": first[base_url]["bron_url"],
+                "sectie": first[base_url].get("sectie", ""),
+            }
+            for base_url in dict.fromkeys(base_urls)
+        ]
 
     def _parse_used_passages(self, answer: str, max_chunk_num: int) -> tuple[str, list[int]]:
         """Haal passage-nummers uit het LLM-antwoord en strip die regel.
@@ -268,94 +841,274 @@ class QAEngine:
         Returns:
             dict met 'answer', 'sources', en 'chunks'
         """
-        chunks = self.search(question)
-        context, chunks_in_context = self.build_context(chunks)
+        return self._drain(self.ask_stream(question))
 
+    def ask_detailed(self, question: str, short_answer: str) -> dict:
+        """
+        Geef een uitgebreider antwoord op dezelfde vraag.
+
+        Hergebruikt dezelfde zoekresultaten maar vraagt de LLM om meer detail.
+        """
+        return self._drain(self._ask_stream(question, short_answer))
+
+    def ask_stream(self, question: str) -> dict:
+        """
+        Beantwoord een vraag met een streamend antwoord (voor st.write_stream).
+
+        'answer_stream' geeft de tekst stukje bij stukje, zonder de GEBRUIKTE
+        PASSAGES-regel. Na afloop van de stream staan het opgeschoonde antwoord en de
+        bronnen in 'answer' en 'sources'.
+
+        Returns:
+            dict met 'answer_stream', 'answer', 'sources', en 'chunks'
+        """
+        return self._ask_stream(question)
+
+    def ask_batch(self, questions: list[str]) -> list[dict]:
+        """
+        Beantwoord meerdere vragen, met per LLM_BATCH_SIZE vragen één LLM-aanroep.
+
+        Zoeken gebeurt in één search_batch. De LLM krijgt per vraag de eigen passages en
+        geeft een JSON-lijst met antwoorden terug; lukt dat niet, dan wordt elke vraag
+        van die groep los beantwoord.
+
+        Returns:
+            per vraag een dict met 'answer', 'sources', en 'chunks' (zoals ask)
+        """
+        results: list[dict | None] = [None] * len(questions)
+        pending = []
+        for i, question in enumerate(questions):
+            cache_key = self._answer_cache.key(question)
+            results[i] = self._answer_cache.get(cache_key)
+            if results[i] is None:
+                pending.append((i, question, cache_key))
+        if not pending:
+            return results
+
+        all_chunks = self.search_batch([question for _, question, _ in pending])
+        items = []
+        for (i, question, cache_key), chunks in zip(pending, all_chunks):
+            results[i] = {"answer": "", "sources": [], "chunks": chunks}
+            context, chunks_in_context = self.build_context(chunks)
+            items.append((results[i], question, context, chunks_in_context, cache_key))
+
+        for start in range(0, len(items), LLM_BATCH_SIZE):
+            group = items[start:start + LLM_BATCH_SIZE]
+            answers = self._complete_batch(group) if len(group) > 1 else None
+            for (result, question, context, chunks_in_context, cache_key), raw in zip(
+                group, answers or [None] * len(group)
+            ):
+                if raw is None:
+                    user_prompt = self._user_prompt(question, context, chunks_in_context)
+                    self._drain({"answer_stream": self._stream_answer(
+                        user_prompt, result, chunks_in_context, cache_key
+                    )})
+                    continue
+                answer, used_indices = self._parse_used_passages(raw, chunks_in_context)
+                self._finish_answer(result, answer, used_indices, chunks_in_context, cache_key)
+        return results
+
+    def _complete_batch(self, group: list[tuple]) -> list[str] | None:
+        """Eén LLM-aanroep voor een groep vragen uit ask_batch.
+
+        Returns:
+            per vraag het ruwe antwoord (met GEBRUIKTE PASSAGES-regel), of None als de
+            aanroep mislukt of de JSON niet klopt
+        """
+        parts = [
+            f"[V{n}] VRAAG VAN DE GEBRUIKER: {question}\n\n"
+            f"BRONPASSAGES bij [V{n}] ({chunks_in_context} genummerde passages):\n\n{context}"
+            for n, (_, question, context, chunks_in_context, _) in enumerate(group, 1)
+        ]
         user_prompt = (
-            f"Hieronder staan {chunks_in_context} genummerde passages uit de Toolkit Verkiezingen.\n\n"
-            f"BRONPASSAGES:\n\n{context}\n\n"
-            f"VRAAG VAN DE GEBRUIKER: {question}\n\n"
-            f"Geef een helder en volledig antwoord op basis van de bovenstaande bronnen. "
-            f"Noem relevante details, uitzonderingen en aandachtspunten.\n"
-            f"BELANGRIJK: Gebruik GEEN inline bronverwijzingen zoals [1] of [bron 2] in je antwoord.\n"
-            f"Sluit af met exact deze regel op een nieuwe regel: GEBRUIKTE PASSAGES: [nummers]\n"
-            f"Gebruik alleen passagenummers van 1 tot {chunks_in_context}."
+            f"Hieronder staan {len(group)} vragen, elk met eigen genummerde passages uit de "
+            f"Toolkit Verkiezingen.\n\n" + "\n\n".join(parts) + "\n\n"
+            "Geef per vraag een helder en volledig antwoord op basis van de bronnen bij die "
+            "vraag. Noem relevante details, uitzonderingen en aandachtspunten.\n"
+            "BELANGRIJK: Gebruik GEEN inline bronverwijzingen zoals [1] of [bron 2].\n"
+            f"Antwoord uitsluitend met een JSON-lijst van {len(group)} objecten, in de "
+            'volgorde van de vragen: [{"antwoord": "...", "passages": [nummers]}]. '
+            "Gebruik bij elke vraag alleen passagenummers uit de passages van die vraag."
         )
-
         try:
-            response = self._llm.chat.completions.create(
-                model=LLM_MODEL,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.3,
+            response = self._complete(
+                user_prompt, max_tokens=LLM_OPTIONS["max_tokens"] * len(group)
             )
-            answer = response.choices[0].message.content
-            answer, used_indices = self._parse_used_passages(answer, chunks_in_context)
+            text = response.choices[0].message.content.strip()
+            # Sommige modellen zetten de JSON in een ```json codeblok
+            text = text.removeprefix("```json").removeprefix("```").removesuffix("```")
+            answers = json.loads(text)
+            if not isinstance(answers, list) or len(answers) != len(group):
+                return None
+            return [
+                f"{item['antwoord']}\n{_PASSAGES_MARKER} "
+                f"{', '.join(str(int(n)) for n in item.get('passages', []))}"
+                for item in answers
+            ]
         except Exception as e:
-            answer = f"Er ging iets mis bij het genereren van het antwoord: {e}"
-            used_indices = []
+            print(f"Batch-antwoord mislukt ({e}), vragen worden los beantwoord")
+            return None
 
-        # Bronnen op basis van wat de LLM daadwerkelijk gebruikte
-        if used_indices:
-            sources = self._get_sources_by_indices(chunks, used_indices)
-        else:
-            # Fallback: bronnen van ALLE chunks die in de context zaten
-            sources = self._get_sources_by_indices(chunks, list(range(chunks_in_context)))
+    @staticmethod
+    def _drain(result: dict) -> dict:
+        """Lees de stream helemaal uit en geef het resultaat zonder 'answer_stream'."""
+        for _ in result.pop("answer_stream"):
+            pass
+        return result
 
-        return {
-            "answer": answer,
-            "sources": sources,
-            "chunks": chunks,
-        }
+    async def aask_stream(self, question: str) -> dict:
+        """
+        Async variant van ask_stream, voor meerdere gelijktijdige vragen in één event loop.
 
-    def ask_detailed(self, question: str, short_answer: str) -> dict:
+        Zoeken (embedding, FAISS, re-ranking) draait in een worker-thread en het antwoord
+        komt via de async client, zodat andere vragen intussen doorlopen.
+
+        Returns:
+            dict met 'answer_stream' (async iterator), 'answer', 'sources', en 'chunks'
         """
-        Geef een uitgebreider antwoord op dezelfde vraag.
+        result, user_prompt, chunks_in_context, cache_key = await asyncio.to_thread(
+            self._prepare_answer, question
+        )
+        if user_prompt is None:
+            result["answer_stream"] = _aiter_once(result["answer"])
+        else:
+            result["answer_stream"] = self._astream_answer(
+                user_prompt, result, chunks_in_context, cache_key
+            )
+        return result
 
-        Hergebruikt dezelfde zoekresultaten maar vraagt de LLM om meer detail.
+    def _ask_stream(self, question: str, short_answer: str | None = None) -> dict:
+        result, user_prompt, chunks_in_context, cache_key = self._prepare_answer(
+            question, short_answer
+        )
+        if user_prompt is None:
+            result["answer_stream"] = iter([result["answer"]])
+        else:
+            result["answer_stream"] = self._stream_answer(
+                user_prompt, result, chunks_in_context, cache_key
+            )
+        return result
+
+    def _prepare_answer(self, question: str, short_answer: str | None = None
+                        ) -> tuple[dict, str | None, int, str | None]:
+        """Zoek de passages en bouw de prompt, of haal het antwoord uit de cache.
+
+        Returns:
+            tuple van (result, user_prompt, chunks_in_context, cache_key);
+            user_prompt is None als het antwoord uit de cache komt
         """
+        # Alleen gewone antwoorden gaan de cache in; uitgebreide hangen af van short_answer
+        cache_key = self._answer_cache.key(question) if short_answer is None else None
+        if cache_key is not None:
+            cached = self._answer_cache.get(cache_key)
+            if cached is not None:
+                return cached, None, 0, None
+
         chunks = self.search(question)
         context, chunks_in_context = self.build_context(chunks)
+        user_prompt = self._user_prompt(question, context, chunks_in_context, short_answer)
+        result = {"answer": "", "sources": [], "chunks": chunks}
+        return result, user_prompt, chunks_in_context, cache_key
 
-        user_prompt = (
+    @staticmethod
+    def _user_prompt(question: str, context: str, chunks_in_context: int,
+                     short_answer: str | None = None) -> str:
+        """Bouw de user-prompt; met `short_answer` wordt om een uitgebreider antwoord gevraagd."""
+        if short_answer is None:
+            instruction = (
+                "Geef een helder en volledig antwoord op basis van de bovenstaande bronnen. "
+                "Noem relevante details, uitzonderingen en aandachtspunten.\n"
+            )
+        else:
+            instruction = (
+                f"Je gaf eerder dit korte antwoord: \"{short_answer}\"\n\n"
+                f"Geef nu een uitgebreider en volledig antwoord. Leg de procedure stap voor stap uit "
+                f"en behandel relevante details, uitzonderingen en aandachtspunten.\n"
+            )
+        return (
             f"Hieronder staan {chunks_in_context} genummerde passages uit de Toolkit Verkiezingen.\n\n"
             f"BRONPASSAGES:\n\n{context}\n\n"
             f"VRAAG VAN DE GEBRUIKER: {question}\n\n"
-            f"Je gaf eerder dit korte antwoord: \"{short_answer}\"\n\n"
-            f"Geef nu een uitgebreider en volledig antwoord. Leg de procedure stap voor stap uit "
-            f"en behandel relevante details, uitzonderingen en aandachtspunten.\n"
+            f"{instruction}"
             f"BELANGRIJK: Gebruik GEEN inline bronverwijzingen zoals [1] of [bron 2] in je antwoord.\n"
             f"Sluit af met exact deze regel op een nieuwe regel: GEBRUIKTE PASSAGES: [nummers]\n"
             f"Gebruik alleen passagenummers van 1 tot {chunks_in_context}."
         )
 
+    def _complete(self, user_prompt: str, stream: bool = False, client=None, **options):
+        """Eén chat-completion met de vaste systeemprompt (met een async client: awaitable).
+
+        `options` overschrijven LLM_OPTIONS voor deze aanroep.
+        """
+        return (client or self._llm).chat.completions.create(
+            model=LLM_MODEL,
+            messages=[_SYSTEM_MESSAGE, {"role": "user", "content": user_prompt}],
+            stream=stream,
+            **{**LLM_OPTIONS, **options},
+        )
+
+    def _stream_answer(self, user_prompt: str, result: dict, chunks_in_context: int,
+                       cache_key: str | None = None) -> Iterator[str]:
+        """Stream het LLM-antwoord en vul na afloop 'answer' en 'sources' in `result`."""
+        answer_filter = _AnswerFilter()
         try:
-            response = self._llm.chat.completions.create(
-                model=LLM_MODEL,
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": user_prompt},
-                ],
-                temperature=0.3,
-            )
-            answer = response.choices[0].message.content
-            answer, used_indices = self._parse_used_passages(answer, chunks_in_context)
+            for event in self._complete(user_prompt, stream=True):
+                text = answer_filter.feed(_delta_text(event))
+                if text:
+                    yield text
+            text = answer_filter.finish()
+            if text:
+                yield text
+            answer, used_indices = self._parse_used_passages(answer_filter.text, chunks_in_context)
+        except Exception as e:
+            answer = f"Er ging iets mis bij het genereren van het antwoord: {e}"
+            used_indices = []
+            cache_key = None
+            yield answer
+        self._finish_answer(result, answer, used_indices, chunks_in_context, cache_key)
+
+    async def _astream_answer(self, user_prompt: str, result: dict, chunks_in_context: int,
+                              cache_key: str | None = None) -> AsyncIterator[str]:
+        """Async tegenhanger van _stream_answer."""
+        answer_filter = _AnswerFilter()
+        try:
+            _, client = _get_async_llm()
+            stream = await _on_llm_loop(self._complete(user_prompt, stream=True, client=client))
+            try:
+                while (event := await _on_llm_loop(_next_or_none(stream))) is not None:
+                    text = answer_filter.feed(_delta_text(event))
+                    if text:
+                        yield text
+            finally:
+                await _on_llm_loop(stream.close())
+            text = answer_filter.finish()
+            if text:
+                yield text
+            answer, used_indices = self._parse_used_passages(answer_filter.text, chunks_in_context)
         except Exception as e:
             answer = f"Er ging iets mis bij het genereren van het antwoord: {e}"
             used_indices = []
+            cache_key = None
+            yield answer
+        self._finish_answer(result, answer, used_indices, chunks_in_context, cache_key)
 
+    def _finish_answer(self, result: dict, answer: str, used_indices: list[int],
+                       chunks_in_context: int, cache_key: str | None):
+        """Zet antwoord en bronnen in `result`; een geslaagd antwoord gaat de cache in."""
+        chunks = result["chunks"]
+        # Bronnen op basis van wat de LLM daadwerkelijk gebruikte
         if used_indices:
             sources = self._get_sources_by_indices(chunks, used_indices)
         else:
+            # Fallback: bronnen van ALLE chunks die in de context zaten
             sources = self._get_sources_by_indices(chunks, list(range(chunks_in_context)))
 
-        return {
-            "answer": answer,
-            "sources": sources,
-            "chunks": chunks,
-        }
+        result["answer"] = answer
+        result["sources"] = sources
+        if cache_key is not None:
+            self._answer_cache.put(
+                cache_key, {"answer": answer, "sources": sources, "chunks": chunks}
+            )
 
 
 # Voor gebruik vanuit command line
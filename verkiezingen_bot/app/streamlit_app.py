@@ -3,12 +3,14 @@ Streamlit chat-interface voor de Verkiezingen Chatbot.
 Design gebaseerd op de Kiesraad Toolkit Verkiezingen huisstijl.
 """
 
-import base64
 import os
 import random
+import re
 import sys
 import time
+from functools import lru_cache
 from pathlib import Path
+from urllib.parse import quote
 
 # Zorg dat de repo-root in het Python-pad staat (nodig voor Streamlit Cloud)
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -22,9 +24,6 @@ try:
 except FileNotFoundError:
     pass
 
-from verkiezingen_bot.app.feedback import save_feedback
-from verkiezingen_bot.app.qa import QAEngine
-
 # Pagina-instellingen
 st.set_page_config(
     page_title="Kiki – Verkiezingen Chatbot GR26",
@@ -33,10 +32,14 @@ st.set_page_config(
 )
 
 
+@lru_cache(maxsize=8)
 def svg_to_data_uri(svg: str) -> str:
-    """Zet een SVG-string om naar een data URI voor gebruik als avatar."""
-    b64 = base64.b64encode(svg.encode()).decode()
-    return f"data:image/svg+xml;base64,{b64}"
+    """Zet een SVG-string om naar een data URI voor gebruik als avatar.
+
+    URL-encoded in plaats van base64 (dat 33% groter is). Enkele quotes en de tekens
+    in `safe` hoeven niet gecodeerd te worden.
+    """
+    return "data:image/svg+xml;charset=utf-8," + quote(svg.replace('"', "'"), safe="=:/,.-;()'")
 
 
 # === AVATAR SVGs ===
@@ -64,15 +67,25 @@ USER_AVATAR_SVG = (
     '</svg>'
 )
 
-ASSISTANT_AVATAR = svg_to_data_uri(PENCIL_AVATAR_SVG)
-USER_AVATAR = svg_to_data_uri(USER_AVATAR_SVG)
+ASSISTANT_AVATAR_URI = svg_to_data_uri(PENCIL_AVATAR_SVG)
+USER_AVATAR_URI = svg_to_data_uri(USER_AVATAR_SVG)
+# st.chat_message krijgt geen avatar mee en toont dus het standaard-icoon voor de rol;
+# de CSS (_static_html) vervangt dat door de SVG hierboven. Zo gaat de SVG één keer mee
+# in de stylesheet in plaats van bij elk chatbericht op elke rerun.
 
 
 # === KIESRAAD HUISSTIJL ===
-st.markdown("""
-<style>
-    @import url('https://fonts.googleapis.com/css2?family=Space+Grotesk:wght@400;500;600;700&family=DM+Sans:ital,wght@0,400;0,500;0,700;1,400&display=swap');
+# Lettertypen via <link> in plaats van @import in de stylesheet: de browser haalt ze
+# parallel op en de rest van de CSS wacht er niet op
+_FONTS_HTML = (
+    '<link rel="preconnect" href="https://fonts.googleapis.com">'
+    '<link rel="preconnect" href="https://fonts.gstatic.com" crossorigin>'
+    '<link rel="stylesheet" href="https://fonts.googleapis.com/css2?family=Space+Grotesk:'
+    'wght@400;500;600;700&family=DM+Sans:ital,wght@0,400;0,500;0,700;1,400&display=swap">'
+)
 
+_CSS = """
+<style>
     /* Verberg Streamlit standaard UI elementen */
     #MainMenu {visibility: hidden;}
     header {visibility: hidden;}
@@ -86,17 +99,12 @@ st.markdown("""
         display: none !important;
     }
 
-    /* Alle tekst in DM Sans — brede override */
+    /* Alle tekst in DM Sans — brede override (chatberichten, markdown en de
+       chat-input vallen al onder de elementselectors) */
     .stApp,
     .stApp p, .stApp li, .stApp span, .stApp div, .stApp td, .stApp th,
     .stApp label, .stApp input, .stApp textarea, .stApp button,
-    .stApp [class*="markdown"],
-    .stApp [data-testid="stChatMessage"],
-    .stApp [data-testid="stChatMessage"] p,
-    .stApp [data-testid="stChatMessage"] li,
-    .stApp [data-testid="stChatMessage"] strong,
-    .stApp [data-testid="stChatMessage"] em,
-    .stApp [data-testid="stChatInput"] textarea {
+    .stApp strong, .stApp em {
         font-family: 'DM Sans', sans-serif !important;
     }
 
@@ -141,13 +149,6 @@ st.markdown("""
         margin-bottom: 0.5rem;
     }
 
-    /* Avatar styling — verwijder vierkante rand rond SVG avatars */
-    [data-testid="stChatMessage"] [data-testid="stAvatar"],
-    [data-testid="stChatMessage"] [data-testid="stAvatar"] > div {
-        background: transparent !important;
-        border: none !important;
-    }
-
     /* Chat input */
     [data-testid="stChatInput"] textarea {
         border-radius: 8px;
@@ -289,32 +290,19 @@ st.markdown("""
     .hb-body {
         display: flex;
     }
-    /* Elke kolom is een vouwpaneel */
+    /* Elke kolom is een vouwpaneel dat na elkaar openvouwt vanuit links */
     .hb-col {
         padding: 10px 20px 14px 20px;
         min-width: 80px;
-    }
-    .hb-col:not(:last-child) {
-        border-right: 1px solid #d0c8b8;
-    }
-    /* Kolom 1: vouwt open vanuit links */
-    .hb-col-1 {
         transform-origin: left center;
         transform: perspective(600px) rotateY(-90deg);
         animation: unfoldCol 0.6s ease-out 0.3s forwards;
     }
-    /* Kolom 2: vouwt open vanuit links */
-    .hb-col-2 {
-        transform-origin: left center;
-        transform: perspective(600px) rotateY(-90deg);
-        animation: unfoldCol 0.6s ease-out 1.1s forwards;
-    }
-    /* Kolom 3: vouwt open vanuit links */
-    .hb-col-3 {
-        transform-origin: left center;
-        transform: perspective(600px) rotateY(-90deg);
-        animation: unfoldCol 0.6s ease-out 1.9s forwards;
+    .hb-col:not(:last-child) {
+        border-right: 1px solid #d0c8b8;
     }
+    .hb-col-2 { animation-delay: 1.1s; }
+    .hb-col-3 { animation-delay: 1.9s; }
     @keyframes unfoldCol {
         0%   { transform: perspective(600px) rotateY(-90deg); }
         100% { transform: perspective(600px) rotateY(0deg); }
@@ -363,71 +351,88 @@ st.markdown("""
 
 
 </style>
-""", unsafe_allow_html=True)
+"""
+
 
+# Vormen van de zeshoekige iconen (viewBox 0 0 100 100). Ze gaan één keer per pagina
+# mee als <symbol> in ICON_SPRITE_HTML; hex_icon verwijst er alleen naar met <use>.
+_HEX_ICON_SHAPES = {
+    # Nederlands rood potlood in zeshoekig kader (blauwe achtergrond)
+    "pencil": (
+        '<polygon points="50,3 93,28 93,72 50,97 7,72 7,28" fill="none" stroke="none"/>'
+        '<g transform="translate(50,48) rotate(-45)">'
+        # Potloodlichaam — dik en rood, zoals het Nederlandse stempotlood
+        '<rect x="-6" y="-26" width="12" height="36" rx="1" fill="#cc0000"/>'
+        # Houtkleurige punt
+        '<polygon points="-6,10 0,20 6,10" fill="#f0c878"/>'
+        # Grafietpunt
+        '<polygon points="-2,16 0,21 2,16" fill="#333"/>'
+        # Metalen ring bovenaan
+        '<rect x="-6" y="-26" width="12" height="4" rx="1" fill="#c0c0c0"/>'
+        # Lichtstreep op potlood
+        '<line x1="-3" y1="-24" x2="-3" y2="10" stroke="#e64040" stroke-width="2" opacity="0.6"/>'
+        '</g>'
+    ),
+    # Stembiljet met stemvakjes — Nederlands verkiezingsthema
+    "ballot": (
+        '<polygon points="50,3 93,28 93,72 50,97 7,72 7,28" fill="#ee8050" stroke="#002f5b" stroke-width="2"/>'
+        # Stembiljet (wit papier)
+        '<rect x="28" y="20" width="44" height="60" rx="2" fill="white"/>'
+        # Vakje 1: leeg stemrondje met naam
+        '<circle cx="37" cy="34" r="5" fill="none" stroke="#002f5b" stroke-width="1.5"/>'
+        '<line x1="47" y1="34" x2="65" y2="34" stroke="#ccc" stroke-width="2"/>'
+        # Vakje 2: ingevuld stemrondje (gestemd!) met naam
+        '<circle cx="37" cy="48" r="5" fill="white" stroke="#002f5b" stroke-width="1.5"/>'
+        '<line x1="32" y1="43" x2="42" y2="53" stroke="#e3032d" stroke-width="2.5" stroke-linecap="round"/>'
+        '<line x1="34" y1="51" x2="40" y2="45" stroke="#e3032d" stroke-width="2.5" stroke-linecap="round"/>'
+        '<line x1="47" y1="48" x2="65" y2="48" stroke="#ccc" stroke-width="2"/>'
+        # Vakje 3: leeg stemrondje met naam
+        '<circle cx="37" cy="62" r="5" fill="none" stroke="#002f5b" stroke-width="1.5"/>'
+        '<line x1="47" y1="62" x2="60" y2="62" stroke="#ccc" stroke-width="2"/>'
+    ),
+    # Vraagteken in zeshoek
+    "search": (
+        '<polygon points="50,3 93,28 93,72 50,97 7,72 7,28" fill="#e3032d"/>'
+        '<text x="50" y="64" text-anchor="middle" fill="white" font-size="50" font-weight="bold"'
+        ' font-family="Space Grotesk, sans-serif">?</text>'
+    ),
+    # Document icoon in zeshoek
+    "source": (
+        '<polygon points="50,5 90,28 90,72 50,95 10,72 10,28" fill="#ee8050"/>'
+        '<rect x="30" y="25" width="40" height="50" rx="2" fill="white"/>'
+        '<line x1="36" y1="38" x2="64" y2="38" stroke="#002f5b" stroke-width="3"/>'
+        '<line x1="36" y1="48" x2="64" y2="48" stroke="#002f5b" stroke-width="3"/>'
+        '<line x1="36" y1="58" x2="55" y2="58" stroke="#002f5b" stroke-width="3"/>'
+    ),
+}
+# Deze iconen hebben een vaste grootte
+_HEX_ICON_SIZES = {"search": 20, "source": 18}
+
+ICON_SPRITE_HTML = (
+    '<svg width="0" height="0" style="position:absolute" xmlns="http://www.w3.org/2000/svg">'
+    + "".join(
+        f'<symbol id="kiki-{name}" viewBox="0 0 100 100">{shape}</symbol>'
+        for name, shape in _HEX_ICON_SHAPES.items()
+    )
+    + "</svg>"
+)
 
+
+@lru_cache(maxsize=32)
 def hex_icon(icon_type="pencil", size=44):
-    """Genereer een zeshoekig icoon in Kiesraad-stijl."""
-    if icon_type == "pencil":
-        # Nederlands rood potlood in zeshoekig kader (blauwe achtergrond)
-        return (
-            f'<svg class="hex-icon" width="{size}" height="{size}" viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg">'
-            '<polygon points="50,3 93,28 93,72 50,97 7,72 7,28" fill="none" stroke="none"/>'
-            '<g transform="translate(50,48) rotate(-45)">'
-            # Potloodlichaam — dik en rood, zoals het Nederlandse stempotlood
-            '<rect x="-6" y="-26" width="12" height="36" rx="1" fill="#cc0000"/>'
-            # Houtkleurige punt
-            '<polygon points="-6,10 0,20 6,10" fill="#f0c878"/>'
-            # Grafietpunt
-            '<polygon points="-2,16 0,21 2,16" fill="#333"/>'
-            # Metalen ring bovenaan
-            '<rect x="-6" y="-26" width="12" height="4" rx="1" fill="#c0c0c0"/>'
-            # Lichtstreep op potlood
-            '<line x1="-3" y1="-24" x2="-3" y2="10" stroke="#e64040" stroke-width="2" opacity="0.6"/>'
-            '</g>'
-            '</svg>'
-        )
-    elif icon_type == "ballot":
-        # Stembiljet met stemvakjes — Nederlands verkiezingsthema
-        return (
-            f'<svg class="hex-icon" width="{size}" height="{size}" viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg">'
-            '<polygon points="50,3 93,28 93,72 50,97 7,72 7,28" fill="#ee8050" stroke="#002f5b" stroke-width="2"/>'
-            # Stembiljet (wit papier)
-            '<rect x="28" y="20" width="44" height="60" rx="2" fill="white"/>'
-            # Vakje 1: leeg stemrondje met naam
-            '<circle cx="37" cy="34" r="5" fill="none" stroke="#002f5b" stroke-width="1.5"/>'
-            '<line x1="47" y1="34" x2="65" y2="34" stroke="#ccc" stroke-width="2"/>'
-            # Vakje 2: ingevuld stemrondje (gestemd!) met naam
-            '<circle cx="37" cy="48" r="5" fill="white" stroke="#002f5b" stroke-width="1.5"/>'
-            '<line x1="32" y1="43" x2="42" y2="53" stroke="#e3032d" stroke-width="2.5" stroke-linecap="round"/>'
-            '<line x1="34" y1="51" x2="40" y2="45" stroke="#e3032d" stroke-width="2.5" stroke-linecap="round"/>'
-            '<line x1="47" y1="48" x2="65" y2="48" stroke="#ccc" stroke-width="2"/>'
-            # Vakje 3: leeg stemrondje met naam
-            '<circle cx="37" cy="62" r="5" fill="none" stroke="#002f5b" stroke-width="1.5"/>'
-            '<line x1="47" y1="62" x2="60" y2="62" stroke="#ccc" stroke-width="2"/>'
-            '</svg>'
-        )
-    elif icon_type == "search":
-        # Vraagteken in zeshoek
-        return (
-            f'<svg class="hex-icon" width="20" height="20" viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg">'
-            '<polygon points="50,3 93,28 93,72 50,97 7,72 7,28" fill="#e3032d"/>'
-            '<text x="50" y="64" text-anchor="middle" fill="white" font-size="50" font-weight="bold"'
-            ' font-family="Space Grotesk, sans-serif">?</text>'
-            '</svg>'
-        )
-    elif icon_type == "source":
-        # Document icoon in zeshoek
-        return (
-            f'<svg class="hex-icon" width="18" height="18" viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg">'
-            '<polygon points="50,5 90,28 90,72 50,95 10,72 10,28" fill="#ee8050"/>'
-            '<rect x="30" y="25" width="40" height="50" rx="2" fill="white"/>'
-            '<line x1="36" y1="38" x2="64" y2="38" stroke="#002f5b" stroke-width="3"/>'
-            '<line x1="36" y1="48" x2="64" y2="48" stroke="#002f5b" stroke-width="3"/>'
-            '<line x1="36" y1="58" x2="55" y2="58" stroke="#002f5b" stroke-width="3"/>'
-            '</svg>'
-        )
-    return ""
+    """Zeshoekig icoon in Kiesraad-stijl: verwijzing naar het symbool in ICON_SPRITE_HTML."""
+    if icon_type not in _HEX_ICON_SHAPES:
+        return ""
+    size = _HEX_ICON_SIZES.get(icon_type, size)
+    return (
+        f'<svg class="hex-icon" width="{size}" height="{size}" viewBox="0 0 100 100">'
+        f'<use href="#kiki-{icon_type}"/></svg>'
+    )
+
+
+# Vaste iconen, één keer opgebouwd per run in plaats van per bericht
+SOURCE_ICON_HTML = hex_icon("source")
+SEARCH_ICON_HTML = hex_icon("search")
 
 
 def _stemvakje_svg(vakje_idx: int) -> str:
@@ -563,15 +568,13 @@ def _make_thinking_html() -> str:
         f'text-align:left;opacity:0;font-size:0.95em;color:#666;white-space:nowrap}}'
         f'.load-msgs{{position:relative !important;flex:1;height:1.5em;margin-top:4px;overflow:hidden}}</style>'
         f'<div class="thinking-animation">'
-        f'<div class="stemvakjes">'
-        + _stemvakje_svg(0) + _stemvakje_svg(1) + _stemvakje_svg(2)
-        + '</div>'
+        f'<div class="stemvakjes">{_static_html()[2]}</div>'
         f'<div class="load-msgs">{spans}</div>'
         f'</div>'
     )
 
 # Header met stembiljet
-st.markdown("""
+_HEADER_HTML = """
 <div class="kiki-header">
     <div class="header-ballot">
         <div class="hb-title">CHATBOT KIKI</div>
@@ -596,42 +599,209 @@ st.markdown("""
         </div>
     </div>
 </div>
-""", unsafe_allow_html=True)
+"""
+
+
+# Welkomstblok, getoond zolang er nog geen berichten zijn
+_WELCOME_HTML = f"""
+    <div class="welcome-card">
+        <h3>{hex_icon("ballot", 32)} Welkom bij Kiki!</h3>
+        <p>Ik ben Kiki, een chatbot die vragen beantwoordt over de
+        <strong>gemeenteraadsverkiezingen 2026</strong>. Mijn kennis is gebaseerd op
+        de Toolkit Verkiezingen van de Kiesraad.</p>
+        <div class="welcome-notice">
+            <span class="wn-icon">{SEARCH_ICON_HTML}</span>
+            <span><strong>Goed om te weten:</strong> Kiki heeft geen geheugen — elke vraag
+            wordt los beantwoord. Stel dus elke keer een complete vraag.</span>
+        </div>
+        <div class="welcome-notice">
+            <span class="wn-icon">{SOURCE_ICON_HTML}</span>
+            <span><strong>Disclaimer:</strong> Kiki is een AI-assistent en kan fouten maken.
+            Controleer belangrijke informatie altijd op
+            <a href="https://www.kiesraad.nl" target="_blank">kiesraad.nl</a>.
+            <a href="/Over_Kiki" target="_self">Meer informatie over Kiki</a>.</span>
+        </div>
+    </div>
+    """
+
+
+@st.cache_data(show_spinner=False)
+def _static_html() -> tuple[str, str, str]:
+    """Vaste markup, één keer per proces opgebouwd: (fonts + css, header, stemvakjes).
+
+    De CSS wordt geminified (commentaar weg, witruimte samengevoegd), zodat er bij
+    elke rerun minder over de websocket gaat, en bevat ook de avatar-afbeeldingen en
+    de icoon-symbolen.
+    """
+    css = re.sub(r"/\*.*?\*/", "", _CSS, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = _FONTS_HTML + ICON_SPRITE_HTML + re.sub(r"\s*([{};])\s*", r"\1", css).strip()
+    css += (
+        "<style>"
+        f'[data-testid="stChatMessageAvatarAssistant"]{{background:url("{ASSISTANT_AVATAR_URI}")'
+        " center/contain no-repeat !important}"
+        f'[data-testid="stChatMessageAvatarUser"]{{background:url("{USER_AVATAR_URI}")'
+        " center/contain no-repeat !important}"
+        '[data-testid^="stChatMessageAvatar"] > *{visibility:hidden}'
+        "</style>"
+    )
+    stemvakjes = _stemvakje_svg(0) + _stemvakje_svg(1) + _stemvakje_svg(2)
+    return css, _HEADER_HTML, stemvakjes
+
+
+_css_html, _header_html, _ = _static_html()
+st.markdown(_css_html, unsafe_allow_html=True)
+st.markdown(_header_html, unsafe_allow_html=True)
+
 
+def render_answer(message: dict):
+    """Toon een antwoord met bronnen en responstijd als één markdown-element.
 
+    De HTML wordt één keer opgebouwd en bij het bericht bewaard; bij volgende reruns
+    wordt die hergebruikt. HTML-tags in het antwoord zelf worden niet uitgevoerd.
+    """
+    html = message.get("_html")
+    if html is None:
+        parts = [message["content"].replace("<", "&lt;")]
+        if message.get("sources"):
+            parts.append(_sources_html(message["sources"]))
+        if message.get("response_time"):
+            parts.append(
+                f'<div class="response-time">Antwoord in {message["response_time"]:.1f} seconden</div>'
+            )
+        # Lege regels tussen de delen: elk HTML-blok moet op een nieuwe alinea beginnen
+        html = message["_html"] = "\n\n".join(parts)
+    st.markdown(html, unsafe_allow_html=True)
 
-def render_sources(sources: list[dict]):
-    """Toon bronverwijzingen onder een antwoord."""
+
+def _sources_html(sources: list[dict]) -> str:
+    """Bouw de bronnen-box; lege string als er geen bronnen zijn."""
     if not sources:
-        return
-    html = f'<div class="source-box">'
-    html += f'<div class="source-title">{hex_icon("source")} Bronnen</div>'
-    html += '<ul>'
+        return ""
+    items = []
     for src in sources:
         titel = src.get("titel", "Onbekend")
         url = src.get("url", "")
         sectie = src.get("sectie", "") or src.get("hoofdstuk", "")
         label = f"{titel} &ndash; {sectie}" if sectie else titel
         if url:
-            html += f'<li><a href="{url}" target="_blank">{label}</a></li>'
+            items.append(f'<li><a href="{url}" target="_blank">{label}</a></li>')
         else:
-            html += f"<li>{label}</li>"
-    html += "</ul></div>"
-    st.markdown(html, unsafe_allow_html=True)
+            items.append(f"<li>{label}</li>")
+    return (
+        f'<div class="source-box"><div class="source-title">{SOURCE_ICON_HTML} Bronnen</div>'
+        f'<ul>{"".join(items)}</ul></div>'
+    )
 
 
-def render_response_time(seconds: float):
-    """Toon hoe lang het antwoord duurde."""
-    st.markdown(
-        f'<div class="response-time">Antwoord in {seconds:.1f} seconden</div>',
-        unsafe_allow_html=True,
-    )
+# Streaming: maximaal ~20 updates per seconde naar st.write_stream (elke update
+# rendert de hele markdown tot dan toe opnieuw)
+STREAM_FLUSH_INTERVAL = 0.05  # seconden
+STREAM_FLUSH_MIN_CHARS = 8
+
+
+def _coalesce(stream):
+    """Bundel kleine stukjes uit een tekststream tot minder, grotere updates."""
+    buffer = ""
+    last_flush = time.monotonic()
+    for text in stream:
+        buffer += text
+        now = time.monotonic()
+        if now - last_flush >= STREAM_FLUSH_INTERVAL and len(buffer) >= STREAM_FLUSH_MIN_CHARS:
+            yield buffer
+            buffer = ""
+            last_flush = now
+    if buffer:
+        yield buffer
+
+
+def _clear_on_first(stream, placeholder):
+    """Geef de stream door; `placeholder` wordt leeggemaakt vlak voor het eerste stuk."""
+    for text in stream:
+        if placeholder is not None:
+            placeholder.empty()
+            placeholder = None
+        yield text
+
+
+def _give_feedback(idx: int, message: dict, rating: str):
+    """Callback van de feedback-knoppen: bewaar de beoordeling (met eventuele toelichting)."""
+    st.session_state.feedback[str(idx)] = rating
+    st.session_state.pop(f"show_comment_{idx}", None)
+    comment = st.session_state.get(f"comment_{idx}", "")
+    from verkiezingen_bot.app.feedback import save_feedback
+
+    save_feedback(message.get("question", ""), message["content"], rating, comment)
+
+
+def _show_comment(idx: int):
+    """Callback van de duim-omlaag-knop: vraag om een toelichting."""
+    st.session_state[f"show_comment_{idx}"] = True
+
+
+@st.fragment
+def render_feedback(idx: int, message: dict):
+    """Feedback-knoppen bij een assistant-bericht.
+
+    Als fragment: een klik draait alleen dit blok opnieuw, niet de hele chatgeschiedenis.
+    De knoppen werken via callbacks, die vóór die rerun de session state bijwerken.
+    Alleen "Meer hierover" herlaadt de hele app (er komt een bericht bij).
+    """
+    fb_key = str(idx)
+    if fb_key in st.session_state.feedback:
+        # Feedback al gegeven — toon bevestiging
+        rating = st.session_state.feedback[fb_key]
+        icon = "\U0001f44d" if rating == "positief" else "\U0001f44e"
+        st.markdown(
+            f'<div class="feedback-thanks">{icon} Bedankt voor je feedback!</div>',
+            unsafe_allow_html=True,
+        )
+    elif st.session_state.get(f"show_comment_{idx}"):
+        # Negatief geklikt, wacht op toelichting. In een form: pas bij versturen een rerun
+        with st.form(key=f"fb_form_{idx}", border=False):
+            st.text_input(
+                "Wat klopt er niet? (optioneel)",
+                key=f"comment_{idx}",
+                placeholder="Bijv. het antwoord gaat over het verkeerde model...",
+            )
+            st.form_submit_button("Verstuur feedback", on_click=_give_feedback,
+                                  args=(idx, message, "negatief"))
+    else:
+        # Toon duim knoppen + "Meer hierover" knop
+        is_last_assistant = idx == len(st.session_state.messages) - 1
+        # Na één klik verdwijnt de knop, zodat een dubbelklik geen tweede LLM-aanroep geeft
+        show_detail = (is_last_assistant and not message.get("is_detailed")
+                       and not message.get("detail_requested"))
+        if show_detail:
+            cols = st.columns([1, 1, 2, 4])
+        else:
+            cols = st.columns([1, 1, 6])
+        with cols[0]:
+            st.button("\U0001f44d", key=f"pos_{idx}", help="Correct antwoord",
+                      on_click=_give_feedback, args=(idx, message, "positief"))
+        with cols[1]:
+            st.button("\U0001f44e", key=f"neg_{idx}", help="Niet correct",
+                      on_click=_show_comment, args=(idx,))
+        # "Meer hierover" knop — alleen bij het laatste kennisvraag-antwoord
+        if show_detail:
+            with cols[2]:
+                if st.button("Meer hierover", key=f"detail_{idx}", help="Uitgebreider antwoord"):
+                    message["detail_requested"] = True
+                    st.session_state["detail_request"] = idx
+                    st.rerun()
 
 
 @st.cache_resource
 def load_engine_v3():
     """Laad de QA engine (cached zodat het maar 1x gebeurt)."""
-    return QAEngine()
+    # Pas hier importeren: qa trekt torch, sentence-transformers en faiss binnen. Zo
+    # staan header en CSS al op de pagina terwijl dat onder de spinner gebeurt.
+    from verkiezingen_bot.app.qa import QAEngine
+
+    engine = QAEngine()
+    # Modellen en index nu laden, onder de spinner, in plaats van bij de eerste vraag
+    engine.warmup()
+    return engine
 
 
 # Laad engines
@@ -644,164 +814,111 @@ if "messages" not in st.session_state:
 if "feedback" not in st.session_state:
     st.session_state.feedback = {}  # {msg_index: "positief" | "negatief"}
 
-# Welkomstblok als er nog geen berichten zijn
+# Welkomstblok als er nog geen berichten zijn (placeholder: verdwijnt bij de eerste vraag)
+welcome_placeholder = st.empty()
 if not st.session_state.messages:
-    pencil_mini = hex_icon("search")
-
-    notice_icon = hex_icon("search")
-    doc_icon = hex_icon("source")
-    st.markdown(f"""
-    <div class="welcome-card">
-        <h3>{hex_icon("ballot", 32)} Welkom bij Kiki!</h3>
-        <p>Ik ben Kiki, een chatbot die vragen beantwoordt over de
-        <strong>gemeenteraadsverkiezingen 2026</strong>. Mijn kennis is gebaseerd op
-        de Toolkit Verkiezingen van de Kiesraad.</p>
-        <div class="welcome-notice">
-            <span class="wn-icon">{notice_icon}</span>
-            <span><strong>Goed om te weten:</strong> Kiki heeft geen geheugen — elke vraag
-            wordt los beantwoord. Stel dus elke keer een complete vraag.
-            De eerste vraag kan even duren (~30 sec.).</span>
-        </div>
-        <div class="welcome-notice">
-            <span class="wn-icon">{doc_icon}</span>
-            <span><strong>Disclaimer:</strong> Kiki is een AI-assistent en kan fouten maken.
-            Controleer belangrijke informatie altijd op
-            <a href="https://www.kiesraad.nl" target="_blank">kiesraad.nl</a>.
-            <a href="/Over_Kiki" target="_self">Meer informatie over Kiki</a>.</span>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
-
-# Toon eerdere berichten
-for idx, message in enumerate(st.session_state.messages):
-    avatar = ASSISTANT_AVATAR if message["role"] == "assistant" else USER_AVATAR
-    with st.chat_message(message["role"], avatar=avatar):
-        st.markdown(message["content"])
-
-        if message.get("sources"):
-            render_sources(message["sources"])
-
-        if message.get("response_time"):
-            render_response_time(message["response_time"])
-
-        # Feedback-knoppen bij assistant-berichten
+    welcome_placeholder.markdown(_WELCOME_HTML, unsafe_allow_html=True)
+
+# Toon eerdere berichten: alleen de laatste MAX_VISIBLE_MESSAGES, oudere pas op verzoek,
+# zodat een lange sessie niet bij elke rerun de hele geschiedenis opnieuw verstuurt
+MAX_VISIBLE_MESSAGES = 20
+first_visible = 0
+if not st.session_state.get("show_older"):
+    first_visible = max(0, len(st.session_state.messages) - MAX_VISIBLE_MESSAGES)
+if first_visible:
+    st.button(
+        f"Toon eerdere berichten ({first_visible})", key="show_older_btn",
+        on_click=st.session_state.update, kwargs={"show_older": True},
+    )
+for idx, message in enumerate(st.session_state.messages[first_visible:], first_visible):
+    with st.chat_message(message["role"]):
         if message["role"] == "assistant":
-            fb_key = str(idx)
-            if fb_key in st.session_state.feedback:
-                # Feedback al gegeven — toon bevestiging
-                rating = st.session_state.feedback[fb_key]
-                icon = "\U0001f44d" if rating == "positief" else "\U0001f44e"
-                st.markdown(
-                    f'<div class="feedback-thanks">{icon} Bedankt voor je feedback!</div>',
-                    unsafe_allow_html=True,
-                )
-            elif st.session_state.get(f"show_comment_{idx}"):
-                # Negatief geklikt, wacht op toelichting
-                comment = st.text_input(
-                    "Wat klopt er niet? (optioneel)",
-                    key=f"comment_{idx}",
-                    placeholder="Bijv. het antwoord gaat over het verkeerde model...",
-                )
-                if st.button("Verstuur feedback", key=f"send_{idx}"):
-                    question = ""
-                    for prev in range(idx - 1, -1, -1):
-                        if st.session_state.messages[prev]["role"] == "user":
-                            question = st.session_state.messages[prev]["content"]
-                            break
-                    save_feedback(question, message["content"], "negatief", comment)
-                    st.session_state.feedback[fb_key] = "negatief"
-                    del st.session_state[f"show_comment_{idx}"]
-                    st.rerun()
-            else:
-                # Toon duim knoppen + "Meer hierover" knop
-                is_last_assistant = idx == len(st.session_state.messages) - 1
-                show_detail = is_last_assistant and not message.get("is_detailed")
-                if show_detail:
-                    cols = st.columns([1, 1, 2, 4])
-                else:
-                    cols = st.columns([1, 1, 6])
-                with cols[0]:
-                    if st.button("\U0001f44d", key=f"pos_{idx}", help="Correct antwoord"):
-                        st.session_state.feedback[fb_key] = "positief"
-                        question = ""
-                        for prev in range(idx - 1, -1, -1):
-                            if st.session_state.messages[prev]["role"] == "user":
-                                question = st.session_state.messages[prev]["content"]
-                                break
-                        save_feedback(question, message["content"], "positief")
-                        st.rerun()
-                with cols[1]:
-                    if st.button("\U0001f44e", key=f"neg_{idx}", help="Niet correct"):
-                        st.session_state[f"show_comment_{idx}"] = True
-                        st.rerun()
-                # "Meer hierover" knop — alleen bij het laatste kennisvraag-antwoord
-                if show_detail:
-                    with cols[2]:
-                        if st.button("Meer hierover", key=f"detail_{idx}", help="Uitgebreider antwoord"):
-                            st.session_state["detail_request"] = idx
-                            st.rerun()
+            render_answer(message)
+            # Feedback-knoppen: de enige interactieve elementen bij een antwoord
+            render_feedback(idx, message)
+        else:
+            st.markdown(message["content"])
 
 # Verwerk "Meer hierover" verzoek
 if "detail_request" in st.session_state:
     detail_idx = st.session_state.pop("detail_request")
-    # Zoek de oorspronkelijke vraag
-    question = ""
-    for prev in range(detail_idx - 1, -1, -1):
-        if st.session_state.messages[prev]["role"] == "user":
-            question = st.session_state.messages[prev]["content"]
-            break
+    # De oorspronkelijke vraag staat bij het antwoord opgeslagen
+    question = st.session_state.messages[detail_idx].get("question", "")
     short_answer = st.session_state.messages[detail_idx]["content"]
 
     if question:
-        with st.chat_message("assistant", avatar=ASSISTANT_AVATAR):
+        with st.chat_message("assistant"):
             thinking_placeholder = st.empty()
             thinking_placeholder.markdown(_make_thinking_html(), unsafe_allow_html=True)
 
             start_time = time.time()
             result = engine.ask_detailed(question, short_answer)
             elapsed = time.time() - start_time
+            # Direct opslaan, vóór de volgende Streamlit-aanroep: wordt deze run door
+            # een nieuwe klik onderbroken, dan gaat het antwoord niet verloren
+            st.session_state.messages.append({
+                "role": "assistant",
+                "content": result["answer"],
+                "sources": result["sources"],
+                "response_time": elapsed,
+                "question": question,
+                "is_detailed": True,
+            })
 
             thinking_placeholder.empty()
 
-        st.session_state.messages.append({
-            "role": "assistant",
-            "content": result["answer"],
-            "sources": result["sources"],
-            "response_time": elapsed,
-            "is_detailed": True,
-        })
         st.rerun()
 
 if prompt := st.chat_input("Stel een vraag over het verkiezingsproces..."):
+    welcome_placeholder.empty()
     # Sla vraag op en toon in chat
     st.session_state.messages.append({"role": "user", "content": prompt})
-    with st.chat_message("user", avatar=USER_AVATAR):
+    with st.chat_message("user"):
         st.markdown(prompt)
 
     # Toon denkanimatie terwijl antwoord wordt gegenereerd
-    with st.chat_message("assistant", avatar=ASSISTANT_AVATAR):
+    with st.chat_message("assistant"):
+        # De denk-animatie blijft staan tot het eerste stuk antwoord binnen is (zoeken
+        # en wachten op het eerste token van de LLM); het antwoord komt in een eigen vak
         thinking_placeholder = st.empty()
         thinking_placeholder.markdown(_make_thinking_html(), unsafe_allow_html=True)
+        answer_placeholder = st.empty()
 
         start_time = time.time()
-        result = engine.ask(prompt)
-        elapsed = time.time() - start_time
+        result = engine.ask_stream(prompt)
+        # Toon het antwoord terwijl het binnenkomt; daarna staat het opgeschoonde
+        # antwoord met bronnen in result
+        with answer_placeholder.container():
+            st.write_stream(
+                _clear_on_first(_coalesce(result["answer_stream"]), thinking_placeholder)
+            )
         thinking_placeholder.empty()
+        elapsed = time.time() - start_time
 
-        st.session_state.messages.append({
+        message = {
             "role": "assistant",
             "content": result["answer"],
             "sources": result["sources"],
             "response_time": elapsed,
-        })
-
-    # Herlaad pagina zodat bronnen/data en feedback-knoppen getoond worden
-    st.rerun()
-
-# Scroll naar het laatste bericht na rerun
+            "question": prompt,
+        }
+        st.session_state.messages.append(message)
+
+        # Geen st.rerun(): vervang de stream in deze run door het opgeschoonde antwoord
+        # met bronnen en toon de feedback-knoppen, zonder de geschiedenis opnieuw te renderen
+        with answer_placeholder.container():
+            render_answer(message)
+        render_feedback(len(st.session_state.messages) - 1, message)
+
+# Scroll naar het laatste bericht: een anker onderaan plus één MutationObserver per
+# pagina (geen iframe per rerun) die bij nieuwe elementen naar het anker scrolt
 if st.session_state.messages:
-    import streamlit.components.v1 as components
-    components.html(
-        '<script>window.parent.document.querySelector("section.main").scrollTo(0, window.parent.document.querySelector("section.main").scrollHeight);</script>',
-        height=0,
+    st.html(
+        '<div id="kiki-bottom"></div>'
+        '<script>if (!window.kikiScroll) {'
+        'window.kikiScroll = new MutationObserver(() => '
+        'document.getElementById("kiki-bottom")?.scrollIntoView({block: "end"}));'
+        'window.kikiScroll.observe(document.body, {childList: true, subtree: true});'
+        '}</script>',
+        unsafe_allow_javascript=True,
     )
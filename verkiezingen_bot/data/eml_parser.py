@@ -282,6 +282,10 @@ FROM stembureaus sb
 JOIN gemeenten g ON g.id = sb.gemeente_id;
 """
 
+# De views worden na het bouwen gematerialiseerd tot tabellen met dezelfde naam
+# (de data verandert niet meer), zodat queries niet telkens opnieuw aggregeren.
+MATERIALIZED_VIEWS = ["v_gemeente_partij", "v_kieskring_partij", "v_stembureau_overzicht"]
+
 INDEXES = """
 CREATE INDEX IF NOT EXISTS idx_partijen_verkiezing ON partijen(verkiezing_id);
 CREATE INDEX IF NOT EXISTS idx_kandidaten_verkiezing ON kandidaten(verkiezing_id);
@@ -290,6 +294,8 @@ CREATE INDEX IF NOT EXISTS idx_gemeenten_verkiezing ON gemeenten(verkiezing_id);
 CREATE INDEX IF NOT EXISTS idx_stembureaus_gemeente ON stembureaus(gemeente_id);
 CREATE INDEX IF NOT EXISTS idx_stemmen_partij_stembureau ON stemmen_partij(stembureau_id);
 CREATE INDEX IF NOT EXISTS idx_stemmen_partij_partij ON stemmen_partij(partij_id);
+-- Covering index voor v_gemeente_partij: SUM(stemmen) zonder de tabel zelf te lezen
+CREATE INDEX IF NOT EXISTS idx_stemmen_partij_covering ON stemmen_partij(stembureau_id, partij_id, stemmen);
 CREATE INDEX IF NOT EXISTS idx_partijen_naam_kort ON partijen(naam_kort);
 CREATE INDEX IF NOT EXISTS idx_gemeenten_naam ON gemeenten(naam);
 CREATE INDEX IF NOT EXISTS idx_kieskringen_verkiezing ON kieskringen(verkiezing_id);
@@ -301,6 +307,13 @@ CREATE INDEX IF NOT EXISTS idx_csb_stemmen_partij_partij ON csb_stemmen_partij(p
 CREATE INDEX IF NOT EXISTS idx_csb_stemmen_kandidaat_kandidaat ON csb_stemmen_kandidaat(kandidaat_id);
 """
 
+MATERIALIZED_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_v_gemeente_partij_gemeente ON v_gemeente_partij(gemeente, partij_kort);
+CREATE INDEX IF NOT EXISTS idx_v_gemeente_partij_partij ON v_gemeente_partij(partij_kort);
+CREATE INDEX IF NOT EXISTS idx_v_kieskring_partij_kieskring ON v_kieskring_partij(kieskring, partij_kort);
+CREATE INDEX IF NOT EXISTS idx_v_stembureau_overzicht_gemeente ON v_stembureau_overzicht(gemeente);
+"""
+
 
 # ---------------------------------------------------------------------------
 # Parser functies
@@ -311,13 +324,37 @@ def _create_db(db_path: Path) -> sqlite3.Connection:
     if db_path.exists():
         db_path.unlink()
     conn = sqlite3.connect(str(db_path))
+    # page_size moet vóór de eerste tabel (en vóór WAL) gezet worden
+    conn.execute("PRAGMA page_size=8192")
     conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MiB
+    conn.execute("PRAGMA temp_store=MEMORY")
     conn.execute("PRAGMA foreign_keys=ON")
     conn.executescript(SCHEMA)
     conn.commit()
     return conn
 
 
+def materialize_views(conn: sqlite3.Connection):
+    """Vervang de views door tabellen met dezelfde naam en inhoud."""
+    for name in MATERIALIZED_VIEWS:
+        row = conn.execute("SELECT type FROM sqlite_master WHERE name = ?", (name,)).fetchone()
+        if row is None or row[0] != "view":
+            continue
+        conn.execute(f"CREATE TABLE {name}_tmp AS SELECT * FROM {name}")
+        conn.execute(f"DROP VIEW {name}")
+        conn.execute(f"ALTER TABLE {name}_tmp RENAME TO {name}")
+    conn.commit()
+
+
+def optimize_database(conn: sqlite3.Connection):
+    """Maak (ontbrekende) indexes aan en verzamel statistieken voor de query planner."""
+    conn.executescript(INDEXES)
+    conn.executescript(MATERIALIZED_INDEXES)
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
 def _find_zips(eml_dir: Path) -> list[Path]:
     """Vind alle EML zip-bestanden."""
     zips = sorted(eml_dir.glob("*.zip"))
@@ -945,8 +982,8 @@ def build_database(eml_dir: Path = EML_DIR, db_path: Path = DB_PATH):
 
         print("\n5. Views en indexes aanmaken...")
         conn.executescript(VIEWS)
-        conn.executescript(INDEXES)
-        conn.commit()
+        materialize_views(conn)
+        optimize_database(conn)
 
         # Verificatie
         print("\n=== Verificatie ===")
@@ -0,0 +1,133 @@
+"""
+Tests voor de data engine: template-antwoorden en opschonen van LLM-output.
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from verkiezingen_bot.app import data_engine
+from verkiezingen_bot.app.data_engine import (
+    DataEngine,
+    _clean_sql,
+    _format_number,
+    _try_template_answer,
+)
+
+
+class TestTemplateAnswer:
+    def test_geen_rijen(self):
+        assert _try_template_answer(["stemmen"], []) == "Er zijn geen resultaten gevonden."
+
+    def test_enkel_getal(self):
+        assert _try_template_answer(["stemmen"], [(29546,)]) == "Het antwoord is 29.546."
+
+    def test_naam_en_waarde(self):
+        assert _try_template_answer(["partij", "zetels"], [("D66", 26)]) == "D66: 26."
+
+    def test_meerdere_rijen_naar_llm(self):
+        assert _try_template_answer(["partij", "zetels"], [("D66", 26), ("PVV", 26)]) is None
+
+    def test_tekst_zonder_getal_naar_llm(self):
+        assert _try_template_answer(["naam"], [("Amsterdam",)]) is None
+
+    def test_telling_via_count(self):
+        assert _try_template_answer(["COUNT(*)"], [(1234,)]) == "Het antwoord is 1.234."
+
+    def test_jaartal_naar_llm(self):
+        assert _try_template_answer(["jaar"], [(2026,)]) is None
+
+    def test_nummer_naar_llm(self):
+        assert _try_template_answer(["stembureau", "nummer"], [("Stadhuis", 1001)]) is None
+
+    def test_percentage_naar_llm(self):
+        assert _try_template_answer(["opkomst_pct"], [(67.456,)]) is None
+
+
+class TestFormatNumber:
+    def test_duizendtallen(self):
+        assert _format_number(1234567) == "1.234.567"
+
+    def test_decimalen(self):
+        assert _format_number(78.456) == "78,46"
+
+    def test_float_zonder_decimalen(self):
+        assert _format_number(12.0) == "12"
+
+
+class TestCleanSql:
+    def test_kale_query(self):
+        assert _clean_sql("SELECT 1;") == "SELECT 1;"
+
+    def test_markdown_code_block(self):
+        assert _clean_sql("```sql\nSELECT *\nFROM zetels;\n```") == "SELECT *\nFROM zetels;"
+
+    def test_sql_prefix(self):
+        assert _clean_sql("  SQL: SELECT 1;\n") == "SELECT 1;"
+
+    def test_uitleg_na_code_block(self):
+        assert _clean_sql("```\nSELECT 1;\n```\nDeze query telt...") == "SELECT 1;"
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    """Engine op een lege database; de LLM-client wordt aangemaakt maar niet gebruikt."""
+    db_path = tmp_path / "test.db"
+    sqlite3.connect(db_path).close()
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    engine = DataEngine(db_path)
+    yield engine
+    engine.close()
+
+
+class TestQueryTimeout:
+    @pytest.fixture(autouse=True)
+    def korte_timeout(self, monkeypatch):
+        monkeypatch.setattr(data_engine, "QUERY_TIMEOUT", 0.2)
+
+    def test_wachten_op_lock_telt_niet_mee(self, engine):
+        """Een query die achter een andere query wacht, krijgt daarna zijn volle tijd."""
+        engine._conn_lock.acquire()
+        threading.Timer(0.4, engine._conn_lock.release).start()
+        # Genoeg VM-stappen dat de progress handler de deadline controleert
+        sql = (
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 10000) "
+            "SELECT count(*) AS aantal FROM n"
+        )
+        assert engine._query(sql) == (["aantal"], [(10000,)])
+
+    def test_zware_query_afgebroken(self, engine):
+        sql = (
+            "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) "
+            "SELECT count(*) FROM n"
+        )
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            engine._query(sql)
+        assert time.monotonic() - start < 2
+
+
+class TestAskDataAsync:
+    def test_gather_op_eigen_event_loop(self, engine, monkeypatch):
+        """ask_data_async werkt vanaf een andere loop; het werk draait op die van de engine."""
+        loops = []
+
+        async def fake_answer(question):
+            loops.append(asyncio.get_running_loop())
+            await asyncio.sleep(0)
+            return {"answer": question.upper(), "sql": "", "data_table": [], "columns": [],
+                    "error": None}
+
+        monkeypatch.setattr(engine, "_answer", fake_answer)
+
+        async def main():
+            return await asyncio.gather(
+                engine.ask_data_async("eerste vraag"), engine.ask_data_async("tweede vraag")
+            )
+
+        results = asyncio.run(main())
+        assert [r["answer"] for r in results] == ["EERSTE VRAAG", "TWEEDE VRAAG"]
+        assert loops == [engine._loop, engine._loop]
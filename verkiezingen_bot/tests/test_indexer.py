@@ -51,3 +51,11 @@ class TestSplitIntoChunks:
         tekst = "x" * 600 + "\n" + "y" * 600 + "\n" + "z" * 100
         chunks = split_into_chunks(tekst, max_chars=700, overlap=100)
         assert len(chunks) >= 2
+
+    def test_chunks_zijn_slices_van_tekst(self):
+        alineas = [f"Alinea {i}: " + "woord " * (i * 7 % 40) for i in range(30)]
+        tekst = "\n".join(alineas)
+        chunks = split_into_chunks(tekst, max_chars=300, overlap=80)
+        assert len(chunks) > 1
+        for chunk in chunks:
+            assert chunk in tekst
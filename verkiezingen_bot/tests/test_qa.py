@@ -0,0 +1,368 @@
+"""
+Unit tests voor de QA engine: hulpfuncties, caches en de async LLM-koppeling.
+
+Deze tests laden GEEN modellen of index en roepen GEEN LLM aan.
+
+Gebruik: pytest verkiezingen_bot/tests/test_qa.py -v
+"""
+
+import asyncio
+import gc
+import os
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+import pytest
+
+from verkiezingen_bot.app import qa
+from verkiezingen_bot.app.qa import QAEngine
+
+
+# Kleine corpus: modelpagina's, en gewone tekst met "na 17" en "na 6"
+CHUNKS = [
+    {"text": "Het stembureau sluit om 21.00 uur.", "titel": "Organisatie stemming",
+     "heading": "Na 17.00 uur"},
+    {"text": "Z.s.m. na 6 februari de lijsten controleren.", "titel": "Kandidaatstelling",
+     "heading": "Planning"},
+    {"text": "Het stembureau vult model N 10-2 in.", "titel": "Model N 10-2 (Proces-verbaal)",
+     "heading": "Pagina 1"},
+    {"text": "De voorzitter ondertekent het proces-verbaal.",
+     "titel": "Model N 10-2 (Proces-verbaal)", "heading": "Pagina 2"},
+    {"text": "Verzoek om een vervangende stempas.", "titel": "Formulier J 8 (Vervangende stempas)",
+     "heading": ""},
+    {"text": "Model N 10-2 is gewijzigd.", "titel": "Nieuwsbrief", "heading": "Model N 10-1"},
+]
+
+
+class FakeReranker:
+    """Score = aantal gedeelde woorden tussen vraag en tekst."""
+
+    def __init__(self):
+        self.pairs = []
+
+    def predict(self, pairs, **kwargs):
+        self.pairs.extend(pairs)
+        return [len(set(q.lower().split()) & set(t.lower().split())) for q, t in pairs]
+
+
+class NoModel:
+    def encode(self, *args, **kwargs):
+        raise AssertionError("embedding niet verwacht")
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    """Engine zonder geladen modellen; de LLM-client wordt aangemaakt maar niet gebruikt."""
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    return QAEngine()
+
+
+@pytest.fixture
+def loaded_engine(engine):
+    """Engine met de kleine corpus; alleen de re-ranker is (nep) beschikbaar."""
+    engine._chunks = CHUNKS
+    engine._keyword_index = qa._KeywordIndex(CHUNKS)
+    engine._model_chunks = qa._index_model_codes(CHUNKS)
+    engine._model = NoModel()
+    engine._reranker = FakeReranker()
+    return engine
+
+
+class TestKeywordIndex:
+    @pytest.mark.parametrize("keyword", [
+        "stembureau", "stem", "proces-verbaal", "n 10-2", "10-2", "21.00", "na 17", "zzz",
+    ])
+    def test_zelfde_als_substring_zoeken(self, keyword):
+        """De index vindt precies de chunks waarvoor `keyword in tekst` geldt."""
+        index = qa._KeywordIndex(CHUNKS)
+        expected = [
+            i for i, c in enumerate(CHUNKS)
+            if any(keyword in c[field].lower() for field in ("text", "titel", "heading"))
+        ]
+        assert index.lookup(keyword).tolist() == expected
+
+    def test_match_loopt_niet_over_velden_heen(self):
+        # "uur" eindigt de tekst, "organisatie" begint de titel
+        assert qa._KeywordIndex(CHUNKS).lookup("uur.organisatie").tolist() == []
+
+    def test_gecacht_resultaat_niet_muteerbaar(self):
+        result = qa._KeywordIndex(CHUNKS).lookup("stembureau")
+        with pytest.raises(ValueError):
+            result[0] = 99
+
+
+class TestTopK:
+    @pytest.mark.parametrize("k", [0, 1, 3, 5, 10])
+    def test_gelijk_aan_stabiele_sortering(self, k):
+        scores = np.array([0.5, 0.9, 0.5, 0.1, 0.9, 0.5, 0.3])
+        assert qa._top_k(scores, k).tolist() == np.argsort(-scores, kind="stable")[:k].tolist()
+
+
+class TestAnswerFilter:
+    ANSWER = "Het antwoord.\nTweede regel\nGEBRUIKTE PASSAGES: [1, 3]"
+
+    @pytest.mark.parametrize("size", [1, 2, 5, 13, 100])
+    def test_passages_regel_nooit_getoond(self, size):
+        answer_filter = qa._AnswerFilter()
+        parts = [self.ANSWER[i:i + size] for i in range(0, len(self.ANSWER), size)]
+        shown = "".join(answer_filter.feed(p) for p in parts) + answer_filter.finish()
+        assert shown == "Het antwoord.\nTweede regel\n"
+        assert answer_filter.text == self.ANSWER
+
+    def test_regel_die_op_marker_lijkt_wel_getoond(self):
+        answer_filter = qa._AnswerFilter()
+        shown = answer_filter.feed("GEBRUIK") + answer_filter.feed("T wordt ")
+        shown += answer_filter.finish()
+        assert shown == "GEBRUIKT wordt "
+
+
+class TestSearchCaches:
+    def test_query_embedding_eenmaal_berekend(self, engine):
+        calls = []
+
+        class CountingModel:
+            def encode(self, texts, **kwargs):
+                calls.append(list(texts))
+                return np.ones((len(texts), 4), dtype=np.float32)
+
+        engine._model = CountingModel()
+        engine._encode_queries(["Wat is  een volmacht?", "Wat is een volmacht?"])
+        engine._encode_queries([" Wat is een volmacht? "])
+        assert calls == [["Wat is een volmacht?"]]
+
+    def test_zoekresultaat_uit_cache_als_kopie(self, loaded_engine):
+        calls = []
+
+        def search_hits(queries, top_k):
+            calls.append(queries)
+            return [[(2, 0.9), (3, 0.5)] for _ in queries]
+
+        loaded_engine._load = lambda: None
+        loaded_engine._search_hits = search_hits
+        first = loaded_engine.search_batch(["Wat is N 10-2?"], 2)
+        first[0][0]["text"] = "gewijzigd"
+        second = loaded_engine.search_batch(["Wat is  N 10-2? ", "Wat is N 10-2?"], 2)
+        assert calls == [["Wat is N 10-2?"]]
+        assert [c["text"] for c in second[0]] == [CHUNKS[2]["text"], CHUNKS[3]["text"]]
+        assert second[0] == second[1] and second[0][0]["score"] == 0.9
+
+
+class TestModelnummers:
+    @pytest.mark.parametrize("text, codes", [
+        ("Wat is N 10-2?", ["n 10-2"]),
+        ("Waar is model na 31-1 voor?", ["na 31-1"]),
+        ("Formulier J 8 aanvragen", ["j 8"]),
+        ("Verschil tussen N 10-1 en Na 31-2", ["n 10-1", "na 31-2"]),
+    ])
+    def test_herkent_modelnummers(self, text, codes):
+        assert qa._model_codes(text) == codes
+
+    @pytest.mark.parametrize("text", [
+        "Mag het stembureau na 17 uur nog open?",
+        "Wat gebeurt er na 6 weken met de stembiljetten?",
+        "Na 17.00 uur",
+        "Z.s.m. na 6 februari",
+    ])
+    def test_gewone_tekst_is_geen_modelnummer(self, text):
+        assert qa._model_codes(text) == []
+
+    def test_index_alleen_uit_modeltitels(self):
+        index = qa._index_model_codes(CHUNKS)
+        assert sorted(index) == ["j 8", "n 10-2"]
+        assert index["n 10-2"].tolist() == [2, 3]
+
+    def test_nummer_op_meerdere_paginas_niet_eenduidig(self):
+        chunks = CHUNKS + [{"text": "x", "titel": "Model J 8 (Oude versie)", "heading": ""}]
+        assert "j 8" not in qa._index_model_codes(chunks)
+
+    def test_hits_voor_bekend_modelnummer(self, loaded_engine):
+        keywords, codes = loaded_engine._extract_keywords("Wie ondertekent model N 10-2?")
+        assert codes == ["n 10-2"]
+        assert loaded_engine._model_page_hits(codes, keywords, 10) == [(3, 1.0), (2, 0.75)]
+
+    @pytest.mark.parametrize("query", [
+        "Mag het stembureau na 17 uur nog open?",
+        "Na 6 weken, wat dan?",
+        "Verschil tussen N 10-2 en J 8",
+    ])
+    def test_geen_kandidaten_zonder_eenduidig_modelnummer(self, loaded_engine, query):
+        keywords, codes = loaded_engine._extract_keywords(query)
+        assert loaded_engine._model_page_hits(codes, keywords, 10) is None
+
+    def test_modelvraag_zonder_embedding_en_reranker(self, loaded_engine):
+        (hits,) = loaded_engine._search_hits(["Ondertekent de voorzitter N 10-2?"], 1)
+        assert hits == [(3, 1.0)]
+        assert loaded_engine._reranker.pairs == []
+
+
+class TestSearchBatcher:
+    def test_losse_vraag_in_thread_van_aanroeper(self):
+        threads = []
+
+        def search_batch(queries, top_k):
+            threads.append(threading.current_thread())
+            return [[{"text": q.upper()}] for q in queries]
+
+        batcher = qa._SearchBatcher(search_batch)
+        assert batcher.search("vraag", 5) == [{"text": "VRAAG"}]
+        assert threads == [threading.current_thread()]
+
+    def test_gelijktijdige_vragen_gebundeld(self):
+        sizes = []
+
+        def search_batch(queries, top_k):
+            sizes.append(len(queries))
+            time.sleep(0.05)
+            return [[{"text": f"{q}/{top_k}"}] for q in queries]
+
+        batcher = qa._SearchBatcher(search_batch)
+        queries = [f"vraag {i}" for i in range(8)]
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda q: batcher.search(q, 3), queries))
+        assert results == [[{"text": f"{q}/3"}] for q in queries]
+        assert sum(sizes) == 8 and max(sizes) > 1
+
+    def test_fout_gaat_naar_aanroeper(self):
+        def search_batch(queries, top_k):
+            raise ValueError("kapot")
+
+        with pytest.raises(ValueError, match="kapot"):
+            qa._SearchBatcher(search_batch).search("vraag", 5)
+
+    def test_engine_kan_opgeruimd_worden(self, monkeypatch):
+        """Na een zoekvraag houdt geen (worker-)thread de engine nog vast."""
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+        engine = QAEngine()
+        engine._load = lambda: None
+        engine._search_hits = lambda queries, top_k: [[] for _ in queries]
+        assert engine.search("vraag") == []
+        ref = weakref.ref(engine)
+        del engine
+        gc.collect()
+        assert ref() is None
+
+
+class TestAnswerCache:
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return qa._AnswerCache(tmp_path, ttl=60, max_entries=3)
+
+    def _age(self, cache, key, seconds):
+        """Maak de entry `seconds` ouder."""
+        path = cache._dir / f"{key}.json"
+        mtime = time.time() - seconds
+        os.utime(path, (mtime, mtime))
+
+    def test_opslaan_en_ophalen(self, cache):
+        cache.put("a", {"answer": "ja"})
+        assert cache.get("a") == {"answer": "ja"}
+        assert cache.get("b") is None
+
+    def test_sleutel_negeert_witruimte_en_hoofdletters(self, cache):
+        assert cache.key("Wat is  een volmacht?") == cache.key("wat is een volmacht?")
+        assert cache.key("Wat is een volmacht?") != cache.key("Wat is een stempas?")
+
+    def test_verlopen_entry_wordt_verwijderd_bij_lezen(self, cache):
+        cache.put("a", {"answer": "ja"})
+        self._age(cache, "a", 120)
+        assert cache.get("a") is None
+        assert not (cache._dir / "a.json").exists()
+
+    def test_prune_verwijdert_verlopen_en_oudste(self, cache):
+        for i, key in enumerate("abcde"):
+            cache.put(key, {"answer": key})
+            self._age(cache, key, 10 - i)  # "a" is de oudste
+        cache.put("f", {"answer": "f"})
+        self._age(cache, "f", 120)  # verlopen
+        cache.prune()
+        assert sorted(p.name for p in cache._dir.iterdir()) == ["c.json", "d.json", "e.json"]
+
+    def test_eerste_put_ruimt_op(self, tmp_path):
+        old = tmp_path / "oud.json"
+        old.write_text("{}")
+        os.utime(old, (0, 0))
+        qa._AnswerCache(tmp_path, ttl=60).put("a", {"answer": "ja"})
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["a.json"]
+
+
+class FakeModel:
+    """Embedding per vraag uit een vaste tabel."""
+
+    def __init__(self, vectors: dict[str, np.ndarray]):
+        self._vectors = vectors
+
+    def encode(self, texts, **kwargs):
+        return np.stack([self._vectors[t] for t in texts])
+
+
+class TestScores:
+    def test_duidelijke_faiss_winnaar_krijgt_reranker_scores(self, loaded_engine):
+        """Ook als FAISS duidelijk wint, is "score" die van de re-ranker, niet de cosine."""
+        vectors = np.eye(len(CHUNKS), dtype=np.float32)
+        index = faiss.IndexFlatIP(len(CHUNKS))
+        index.add(vectors)
+        query = "Sluit het stembureau om 21.00 uur?"
+        loaded_engine._index = index
+        loaded_engine._model = FakeModel({query: vectors[0]})
+
+        distances, indices = index.search(vectors[:1], 2)
+        assert qa._faiss_dominates(distances[0], indices[0], [(0, 1.0)])
+
+        (hits,) = loaded_engine._search_hits([query], 2)
+        # Alleen de FAISS top_k is gereranked, niet ook de keyword-kandidaten
+        assert len(loaded_engine._reranker.pairs) == 2
+        assert hits[0] == (0, 5)
+
+
+class FakeStream:
+    """Streaming antwoord van de chat API, met de loops waarop het gelezen werd."""
+
+    def __init__(self, parts: list[str]):
+        self._parts = iter(parts)
+        self.loops = set()
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self.loops.add(asyncio.get_running_loop())
+        try:
+            part = next(self._parts)
+        except StopIteration:
+            raise StopAsyncIteration
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=part))])
+
+    async def close(self):
+        self.closed = True
+
+
+class TestAsyncLlm:
+    def test_stream_loopt_via_gedeelde_llm_loop(self, engine, monkeypatch):
+        """Ook bij asyncio.run() per vraag draait de client op één blijvende loop."""
+        llm_loop, _ = qa._get_async_llm()
+        streams = []
+
+        async def create(**kwargs):
+            assert asyncio.get_running_loop() is llm_loop
+            streams.append(FakeStream(["Het ", "antwoord.\n", "GEBRUIKTE PASSAGES: [1]"]))
+            return streams[-1]
+
+        client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+        monkeypatch.setattr(qa, "_async_llm_client", client)
+
+        async def ask():
+            result = {"answer": "", "sources": [], "chunks": [{"text": "x"}]}
+            parts = [p async for p in engine._astream_answer("vraag", result, 1)]
+            return parts, result
+
+        for _ in range(2):
+            parts, result = asyncio.run(ask())
+            assert "".join(parts) == "Het antwoord.\n"
+            assert result["answer"] == "Het antwoord."
+        assert all(s.loops == {llm_loop} and s.closed for s in streams)
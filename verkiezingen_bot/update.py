@@ -9,12 +9,10 @@ Gebruik:
 """
 
 import json
-import pickle
 from pathlib import Path
 
 import faiss
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from tqdm import tqdm
 
 from verkiezingen_bot.scraper.scraper import (
@@ -39,8 +37,13 @@ from verkiezingen_bot.scraper.parser import (
 )
 from verkiezingen_bot.app.indexer import (
     split_into_chunks,
+    build_index,
+    load_embedding_model,
+    ENCODE_BATCH_SIZE,
+    load_chunks,
+    save_chunks,
     FAISS_INDEX_FILE,
-    CHUNKS_FILE,
+    EMBEDDINGS_FILE,
     MODEL_NAME,
     INDEX_DIR,
 )
@@ -309,7 +312,7 @@ def index_new_passages(new_passages: list[dict]):
 
     # Laad embedding model
     print(f"  Laden embedding model: {MODEL_NAME}")
-    model = SentenceTransformer(MODEL_NAME)
+    model = load_embedding_model()
 
     # Genereer embeddings voor nieuwe chunks
     print("  Genereren embeddings...")
@@ -317,33 +320,37 @@ def index_new_passages(new_passages: list[dict]):
     new_embeddings = model.encode(
         texts,
         show_progress_bar=True,
-        batch_size=64,
+        batch_size=ENCODE_BATCH_SIZE,
         normalize_embeddings=True,
-    ).astype(np.float32)
+        convert_to_numpy=True,
+    ).astype(np.float32, copy=False)
 
     # Laad bestaande index en chunks, of maak nieuwe
-    if FAISS_INDEX_FILE.exists() and CHUNKS_FILE.exists():
+    existing_chunks = load_chunks() if FAISS_INDEX_FILE.exists() else None
+    if existing_chunks is not None:
         print("  Laden bestaande FAISS index...")
         index = faiss.read_index(str(FAISS_INDEX_FILE))
-        with open(CHUNKS_FILE, "rb") as f:
-            existing_chunks = pickle.load(f)
 
         print(f"  Bestaande chunks: {len(existing_chunks)}")
 
         # Voeg nieuwe vectors toe
         index.add(new_embeddings)
         all_chunks = existing_chunks + new_chunks
+        if EMBEDDINGS_FILE.exists():
+            all_embeddings = np.concatenate([np.load(EMBEDDINGS_FILE), new_embeddings.astype(np.float16)])
+        else:
+            all_embeddings = None
     else:
         print("  Geen bestaande index gevonden, maak nieuwe aan...")
-        dimension = new_embeddings.shape[1]
-        index = faiss.IndexFlatIP(dimension)
-        index.add(new_embeddings)
+        index = build_index(new_embeddings)
         all_chunks = new_chunks
+        all_embeddings = new_embeddings.astype(np.float16)
 
     # Sla op
     faiss.write_index(index, str(FAISS_INDEX_FILE))
-    with open(CHUNKS_FILE, "wb") as f:
-        pickle.dump(all_chunks, f)
+    save_chunks(all_chunks)
+    if all_embeddings is not None:
+        np.save(EMBEDDINGS_FILE, all_embeddings)
 
     print(f"  Totaal chunks in index: {len(all_chunks)}")
 